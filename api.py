@@ -0,0 +1,228 @@
+"""Servicio HTTP local para el modelo de proyección.
+
+Expone los mismos cálculos que la app de Streamlit para otros sistemas
+internos (presupuesto, BI). Solo usa la librería estándar y orjson.
+
+Uso:
+    python api.py --host 127.0.0.1 --puerto 8502
+
+Endpoints:
+    GET  /salud
+    POST /proyeccion   {"supuestos": {...}, "multiplicador": 1.0}
+    POST /escenarios   {"supuestos": {...}, "variacion_optimista": 20, "variacion_pesimista": -20}
+    POST /lote         {"supuestos": [{...}, {...}, ...], "multiplicadores": [...]}
+
+Los supuestos usan las claves de modelo.SUPUESTOS_DEFAULT; las que falten
+toman el valor por defecto. Las respuestas grandes se comprimen con gzip
+si el cliente envía "Accept-Encoding: gzip".
+"""
+import argparse
+import gzip
+import logging
+import math
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import orjson
+
+from modelo import (
+    COLUMNAS,
+    MESES,
+    VARIACION_OPTIMISTA_DEFAULT,
+    VARIACION_PESIMISTA_DEFAULT,
+    multiplicadores_escenarios,
+    proyectar_lote,
+    validar_supuestos,
+)
+
+MAX_LOTE = 10000
+MAX_CUERPO = 16 * 1024 * 1024
+MIN_BYTES_GZIP = 1024
+# Con floats en JSON el nivel 1 comprime casi igual que el 5 y es ~3x más rápido
+NIVEL_GZIP = 1
+
+
+_log = logging.getLogger(__name__)
+
+
+class ErrorSolicitud(Exception):
+    """Error del cliente que se responde con un código HTTP"""
+
+    def __init__(self, mensaje, codigo=400):
+        super().__init__(mensaje)
+        self.codigo = codigo
+
+
+def _leer_numero(datos, clave, defecto):
+    valor = datos.get(clave, defecto)
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+        raise ErrorSolicitud(f"'{clave}' debe ser numérico")
+    return float(valor)
+
+
+def _validar(supuestos):
+    try:
+        return validar_supuestos(supuestos)
+    except ValueError as e:
+        raise ErrorSolicitud(str(e))
+
+
+def _columnas(matrices, fila=None):
+    """Arreglos contiguos por columna (orjson solo serializa arreglos contiguos)"""
+    if fila is None:
+        return {columna: np.ascontiguousarray(matrices[columna]) for columna in COLUMNAS}
+    return {columna: np.ascontiguousarray(matrices[columna][fila]) for columna in COLUMNAS}
+
+
+# ==========================
+# Endpoints
+# ==========================
+def atender_proyeccion(datos):
+    supuestos = _validar(datos.get("supuestos"))
+    multiplicador = _leer_numero(datos, "multiplicador", 1.0)
+    matrices = proyectar_lote([supuestos], [multiplicador])
+    return {
+        "meses": MESES,
+        "proyeccion": _columnas(matrices, 0),
+    }
+
+
+def atender_escenarios(datos):
+    supuestos = _validar(datos.get("supuestos"))
+    multiplicadores = multiplicadores_escenarios(
+        _leer_numero(datos, "variacion_optimista", VARIACION_OPTIMISTA_DEFAULT),
+        _leer_numero(datos, "variacion_pesimista", VARIACION_PESIMISTA_DEFAULT),
+    )
+    matrices = proyectar_lote([supuestos] * len(multiplicadores), list(multiplicadores.values()))
+    return {
+        "meses": MESES,
+        "escenarios": {nombre: _columnas(matrices, i) for i, nombre in enumerate(multiplicadores)},
+    }
+
+
+def atender_lote(datos):
+    lista = datos.get("supuestos")
+    if not isinstance(lista, list) or not lista:
+        raise ErrorSolicitud("'supuestos' debe ser una lista no vacía")
+    if len(lista) > MAX_LOTE:
+        raise ErrorSolicitud(f"El lote supera el máximo de {MAX_LOTE} juegos de supuestos", 413)
+
+    validados = [_validar(s) for s in lista]
+    multiplicadores = datos.get("multiplicadores")
+    if multiplicadores is not None:
+        if not isinstance(multiplicadores, list) or len(multiplicadores) != len(validados):
+            raise ErrorSolicitud("'multiplicadores' debe tener un valor por juego de supuestos")
+        for m in multiplicadores:
+            if isinstance(m, bool) or not isinstance(m, (int, float)) or not math.isfinite(m):
+                raise ErrorSolicitud("'multiplicadores' debe tener solo números finitos")
+        multiplicadores = np.array(multiplicadores, dtype=float)
+
+    matrices = proyectar_lote(validados, multiplicadores)
+    return {"meses": MESES, "n": len(validados), "columnas": _columnas(matrices)}
+
+
+RUTAS = {
+    "/proyeccion": atender_proyeccion,
+    "/escenarios": atender_escenarios,
+    "/lote": atender_lote,
+}
+
+
+# ==========================
+# Servidor
+# ==========================
+class ManejadorAPI(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "PronosticoAPI/1.0"
+    # Cabeceras y cuerpo se escriben por separado: sin TCP_NODELAY cada
+    # respuesta pequeña espera el ACK retardado del cliente (~40 ms)
+    disable_nagle_algorithm = True
+    silencioso = False
+
+    def log_message(self, formato, *args):
+        if not self.silencioso:
+            super().log_message(formato, *args)
+
+    def _responder(self, codigo, cuerpo):
+        datos = orjson.dumps(cuerpo, option=orjson.OPT_SERIALIZE_NUMPY)
+        comprimido = (
+            len(datos) >= MIN_BYTES_GZIP
+            and "gzip" in self.headers.get("Accept-Encoding", "")
+        )
+        if comprimido:
+            datos = gzip.compress(datos, compresslevel=NIVEL_GZIP)
+
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(datos)))
+        if comprimido:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Vary", "Accept-Encoding")
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_GET(self):
+        if self.path == "/salud":
+            self._responder(200, {"estado": "ok", "endpoints": sorted(RUTAS)})
+        else:
+            self._responder(404, {"error": f"Ruta no encontrada: {self.path}"})
+
+    def do_POST(self):
+        atender = RUTAS.get(self.path)
+        try:
+            largo = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            largo = -1
+        if largo < 0:
+            self.close_connection = True
+            self._responder(400, {"error": "Content-Length inválido"})
+            return
+        if largo > MAX_CUERPO:
+            self.close_connection = True
+            self._responder(413, {"error": "Cuerpo de la solicitud demasiado grande"})
+            return
+        cuerpo = self.rfile.read(largo)
+
+        if atender is None:
+            self._responder(404, {"error": f"Ruta no encontrada: {self.path}"})
+            return
+        try:
+            datos = orjson.loads(cuerpo) if cuerpo else {}
+            if not isinstance(datos, dict):
+                raise ErrorSolicitud("El cuerpo debe ser un objeto JSON")
+            self._responder(200, atender(datos))
+        except orjson.JSONDecodeError as e:
+            self._responder(400, {"error": f"JSON inválido: {e}"})
+        except ErrorSolicitud as e:
+            self._responder(e.codigo, {"error": str(e)})
+        except Exception:
+            # Ninguna solicitud termina sin respuesta
+            _log.exception("Error al atender %s", self.path)
+            self._responder(500, {"error": "Error interno del servidor"})
+
+
+def crear_servidor(host="127.0.0.1", puerto=8502, silencioso=False):
+    """Crea el servidor sin iniciarlo (puerto=0 elige uno libre)"""
+    manejador = type("Manejador", (ManejadorAPI,), {"silencioso": silencioso})
+    return ThreadingHTTPServer((host, puerto), manejador)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio HTTP local del modelo de proyección")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8502)
+    parser.add_argument("--silencioso", action="store_true", help="No registrar cada solicitud")
+    args = parser.parse_args()
+
+    servidor = crear_servidor(args.host, args.puerto, args.silencioso)
+    print(f"API de pronóstico escuchando en http://{args.host}:{servidor.server_address[1]}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
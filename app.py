@@ -1,10 +1,35 @@
+import os
+
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
 from io import BytesIO
 
+import memoria
+import precarga
+from consolidacion import Consolidacion
+from eventos import anios, calendario_manual, filtrar_anio, matriz_eventos
+from modelo import (
+    ESCENARIOS,
+    MESES,
+    SUPUESTOS_DEFAULT,
+    SUPUESTOS_NUMERICOS,
+    completar_reales,
+)
+from validacion import normalizar_calendario, normalizar_reales, reales_del_anio, resumen_reporte
+
+# Arranque diferido (por defecto): el modelo carga primero y las librerías de
+# gráficos (plotly), imágenes (kaleido) y Excel (openpyxl) se importan
+# cuando su sección se muestra o cuando se pide el archivo. Con
+# PRONOSTICO_CARGA_DIFERIDA=0 se importan al inicio y las imágenes y el
+# Excel se generan en cada rerun, como antes.
+# scripts/tiempos_importacion.py compara los dos modos.
+CARGA_DIFERIDA = os.environ.get("PRONOSTICO_CARGA_DIFERIDA", "1") != "0"
+if not CARGA_DIFERIDA:
+    import graficos  # noqa: F401
+    import openpyxl  # noqa: F401
+    import plotly.io.kaleido  # noqa: F401
+
 # Configuración de la página
 st.set_page_config(
     page_title="Pronóstico Financiero - Estado de Resultados",
@@ -85,7 +110,7 @@ if modo_escenarios:
 st.sidebar.subheader("💰 Proyección de Ventas")
 
 # 👇 DEFINIR meses_nombres AL INICIO
-meses_nombres = ["Ene", "Feb", "Mar", "Abr", "May", "Jun", "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"]
+meses_nombres = MESES
 
 ventas_base = st.sidebar.number_input("Ventas del primer mes ($)", min_value=0.0, value=50000.0, step=1000.0)
 crecimiento_ventas = st.sidebar.slider("Crecimiento mensual de ventas (%)", -20.0, 50.0, 3.0, 0.5) / 100
@@ -111,18 +136,60 @@ gastos_operativos = st.sidebar.number_input("Gastos operativos mensuales ($)", m
 gastos_financieros = st.sidebar.number_input("Gastos financieros mensuales ($)", min_value=0.0, value=1000.0, step=100.0)
 tasa_impuestos = st.sidebar.slider("Tasa de impuestos (%)", 0.0, 100.0, 25.0, 1.0)
 
+@st.cache_data(max_entries=8)
+def cargar_calendario(contenido, nombre):
+    """Lee y valida el calendario de eventos (una sola vez por archivo)"""
+    if nombre.lower().endswith(".csv"):
+        return normalizar_calendario(pd.read_csv(BytesIO(contenido)))
+    return normalizar_calendario(pd.read_excel(BytesIO(contenido)))
+
 # Sección 3: Eventos especiales
 st.sidebar.markdown("---")
 st.sidebar.subheader("🎯 Eventos Especiales")
 usar_eventos = st.sidebar.checkbox("Agregar eventos especiales", value=False)
-eventos = {}
+calendario_eventos = None
+modo_eventos = "suma"
 if usar_eventos:
-    num_eventos = st.sidebar.number_input("Número de eventos", min_value=1, max_value=5, value=1)
+    num_eventos = st.sidebar.number_input("Número de eventos", min_value=0, value=1)
+    meses_eventos, impactos_eventos = [], []
     for i in range(num_eventos):
         with st.sidebar.expander(f"Evento {i+1}"):
-            mes_evento = st.selectbox(f"Mes del evento {i+1}", meses_nombres, key=f"mes_ev_{i}")
-            impacto_ventas = st.slider(f"Impacto en ventas (%)", -50.0, 100.0, 0.0, 5.0, key=f"imp_ev_{i}")
-            eventos[mes_evento] = eventos.get(mes_evento, 0) + (impacto_ventas / 100)
+            meses_eventos.append(st.selectbox(f"Mes del evento {i+1}", meses_nombres, key=f"mes_ev_{i}"))
+            impactos_eventos.append(st.slider(f"Impacto en ventas (%)", -50.0, 100.0, 0.0, 5.0, key=f"imp_ev_{i}"))
+    calendario_eventos = calendario_manual(meses_eventos, impactos_eventos)
+
+    archivo_eventos = st.sidebar.file_uploader(
+        "Calendario de eventos (CSV o Excel)",
+        type=["csv", "xlsx"],
+        help="Columnas: Fecha (o Mes), Impacto (%) y, opcionalmente, Entidad y Escenario "
+             "(optimista, realista o pesimista). Las celdas vacías aplican a todos."
+    )
+    if archivo_eventos is not None:
+        try:
+            calendario_archivo, reporte_eventos = cargar_calendario(archivo_eventos.getvalue(), archivo_eventos.name)
+            anios_calendario = anios(calendario_archivo)
+            if len(anios_calendario) > 1:
+                anio_eventos = st.sidebar.selectbox("Año del calendario", anios_calendario, key="anio_eventos")
+                calendario_archivo = filtrar_anio(calendario_archivo, anio_eventos)
+            calendario_eventos = pd.concat([calendario_eventos, calendario_archivo], ignore_index=True)
+            st.sidebar.success(f"✅ {len(calendario_archivo):,} eventos cargados del calendario")
+            if not reporte_eventos.empty:
+                st.sidebar.warning(f"⚠️ {reporte_eventos['fila'].nunique():,} filas del calendario descartadas")
+                with st.sidebar.expander("Ver reporte del calendario"):
+                    st.dataframe(reporte_eventos.head(500), hide_index=True)
+        except ValueError as e:
+            st.sidebar.error(f"❌ {e}")
+        except Exception as e:
+            st.sidebar.error(f"❌ Error al leer el calendario: {e}")
+
+    modo_eventos = st.sidebar.radio(
+        "Eventos en el mismo mes",
+        ["suma", "compuesto"],
+        format_func={"suma": "Sumar impactos", "compuesto": "Componer impactos"}.get,
+        horizontal=True,
+        help="Sumar: +10% y +20% dan +30%. Componer: dan 1.1 × 1.2 = +32%",
+        key="modo_eventos"
+    )
 
 # ==========================
 # Subir datos reales
@@ -135,94 +202,96 @@ archivo_real = st.sidebar.file_uploader(
     help="El archivo debe tener columnas: Mes, Ventas, Costo de ventas, Gastos operativos, Gastos financieros"
 )
 
+@st.cache_data(max_entries=8)
+def cargar_reales(contenido):
+    """Lee y valida el Excel de datos reales (una sola vez por archivo)"""
+    return normalizar_reales(pd.read_excel(BytesIO(contenido)))
+
 df_real = None
 if archivo_real is not None:
     try:
-        df_real = pd.read_excel(archivo_real)
-        required_cols = ["Mes", "Ventas", "Costo de ventas", "Gastos operativos", "Gastos financieros"]
-        if not all(col in df_real.columns for col in required_cols):
-            st.sidebar.error("❌ Faltan columnas requeridas.")
-            df_real = None
+        df_real, reporte_reales = cargar_reales(archivo_real.getvalue())
+        resumen = resumen_reporte(reporte_reales)
+        if df_real is None:
+            st.sidebar.error("❌ El archivo no tiene filas válidas.")
         else:
-            for col in ["Ventas", "Costo de ventas", "Gastos operativos", "Gastos financieros"]:
-                df_real[col] = pd.to_numeric(df_real[col], errors='coerce')
-            df_real["Utilidad bruta"] = df_real["Ventas"] - df_real["Costo de ventas"]
-            df_real["EBIT"] = df_real["Utilidad bruta"] - df_real["Gastos operativos"]
-            df_real["Utilidad antes de impuestos"] = df_real["EBIT"] - df_real["Gastos financieros"]
-            df_real["Impuestos"] = df_real["Utilidad antes de impuestos"].apply(lambda x: max(0, x)) * (tasa_impuestos / 100)
-            df_real["Utilidad neta"] = df_real["Utilidad antes de impuestos"] - df_real["Impuestos"]
-            st.sidebar.success("✅ Datos reales cargados correctamente")
+            # Con fechas de varios años se compara un año a la vez
+            anios_reales = anios(df_real)
+            anio_real = None
+            if len(anios_reales) > 1:
+                anio_real = st.sidebar.selectbox("Año de los datos reales", anios_reales, key="anio_reales")
+            df_real = completar_reales(reales_del_anio(df_real, anio_real), tasa_impuestos)
+            st.sidebar.success(f"✅ Datos reales cargados correctamente ({len(df_real)} meses)")
+        if resumen["errores"] or resumen["avisos"]:
+            st.sidebar.warning(
+                f"⚠️ {resumen['errores']} errores ({resumen['filas_descartadas']} filas descartadas) "
+                f"y {resumen['avisos']} avisos"
+            )
+            with st.sidebar.expander("Ver reporte de validación"):
+                st.dataframe(reporte_reales.head(500), hide_index=True)
+                st.download_button(
+                    label="📥 Descargar reporte completo (.csv)",
+                    data=reporte_reales.to_csv(index=False).encode("utf-8"),
+                    file_name="reporte_validacion.csv",
+                    mime="text/csv",
+                    key="reporte_validacion"
+                )
+    except ValueError as e:
+        st.sidebar.error(f"❌ {e}")
+        df_real = None
     except Exception as e:
         st.sidebar.error(f"❌ Error al leer el archivo: {e}")
         df_real = None
 
 # ==========================
-# Función para calcular proyección
+# Consolidación por jerarquía
 # ==========================
-def calcular_proyeccion(ventas_base, crecimiento, multiplicador=1.0):
-    """Calcula la proyección con un multiplicador para escenarios"""
-    meses = ["Ene", "Feb", "Mar", "Abr", "May", "Jun", "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"]
-    ventas, costo_venta, utilidad_bruta, ebit, utilidad_antes_imp, impuestos, utilidad_neta = [], [], [], [], [], [], []
-
-    # Ajustar crecimiento según el escenario
-    crecimiento_ajustado = crecimiento * multiplicador
-    
-    for t, mes in enumerate(meses):
-        # Crecimiento base
-        venta_mes = ventas_base * ((1 + crecimiento_ajustado) ** t)
-        
-        # Aplicar estacionalidad
-        if usar_estacionalidad and mes in factores_estacionalidad:
-            venta_mes *= factores_estacionalidad[mes]
-        
-        # Aplicar eventos especiales
-        if usar_eventos and mes in eventos:
-            venta_mes *= (1 + eventos[mes])
-        
-        cv = venta_mes * (costo_venta_pct / 100)
-        ub = venta_mes - cv
-        ebit_mes = ub - gastos_operativos
-        uai = ebit_mes - gastos_financieros
-        imp = max(0, uai) * (tasa_impuestos / 100)
-        un = uai - imp
-
-        ventas.append(venta_mes)
-        costo_venta.append(cv)
-        utilidad_bruta.append(ub)
-        ebit.append(ebit_mes)
-        utilidad_antes_imp.append(uai)
-        impuestos.append(imp)
-        utilidad_neta.append(un)
-
-    df = pd.DataFrame({
-        "Mes": meses,
-        "Ventas": ventas,
-        "Costo de ventas": costo_venta,
-        "Utilidad bruta": utilidad_bruta,
-        "Gastos operativos": [gastos_operativos] * 12,
-        "EBIT": ebit,
-        "Gastos financieros": [gastos_financieros] * 12,
-        "Utilidad antes de impuestos": utilidad_antes_imp,
-        "Impuestos": impuestos,
-        "Utilidad neta": utilidad_neta
-    })
-    
-    return df
+st.sidebar.markdown("---")
+st.sidebar.subheader("🏢 Consolidación (opcional)")
+archivo_jerarquia = st.sidebar.file_uploader(
+    "Sube un CSV con la jerarquía de entidades",
+    type=["csv"],
+    help="Columnas: Entidad, Region, Empresa y, opcionalmente, los supuestos de cada entidad "
+         "(ventas_base, crecimiento, costo_venta_pct, gastos_operativos, gastos_financieros, tasa_impuestos)"
+)
 
 # ==========================
 # Cálculos: Proyección (12 meses)
 # ==========================
+supuestos = {
+    "ventas_base": ventas_base,
+    "crecimiento": crecimiento_ventas,
+    "costo_venta_pct": costo_venta_pct,
+    "gastos_operativos": gastos_operativos,
+    "gastos_financieros": gastos_financieros,
+    "tasa_impuestos": tasa_impuestos,
+    "factores_estacionalidad": factores_estacionalidad if usar_estacionalidad else None,
+}
+
+# Sin eventos no se pasa matriz: así la clave del caché coincide con la precalentada
+filas_eventos = pd.DataFrame({"Escenario": ESCENARIOS if modo_escenarios else ["realista"]})
+factores_eventos = (
+    None if calendario_eventos is None
+    else matriz_eventos(calendario_eventos, filas_eventos, modo_eventos)
+)
+if factores_eventos is None:
+    if modo_escenarios:
+        precarga.registrar_uso(supuestos, True, variacion_optimista, variacion_pesimista)
+    else:
+        precarga.registrar_uso(supuestos, False)
+
 if modo_escenarios:
     # Calcular los 3 escenarios
-    df_realista = calcular_proyeccion(ventas_base, crecimiento_ventas, 1.0)
-    df_optimista = calcular_proyeccion(ventas_base, crecimiento_ventas, 1 + (variacion_optimista/100))
-    df_pesimista = calcular_proyeccion(ventas_base, crecimiento_ventas, 1 + (variacion_pesimista/100))
+    escenarios = precarga.escenarios(supuestos, variacion_optimista, variacion_pesimista, factores_eventos)
+    df_realista = escenarios["realista"]
+    df_optimista = escenarios["optimista"]
+    df_pesimista = escenarios["pesimista"]
     
     # Por defecto mostramos el realista
     df_proy = df_realista
 else:
     # Solo calcular escenario base
-    df_proy = calcular_proyeccion(ventas_base, crecimiento_ventas, 1.0)
+    df_proy = precarga.proyeccion(supuestos, factores_eventos)
 
 # ==========================
 # Métricas clave mejoradas
@@ -287,6 +356,32 @@ else:
 st.markdown("---")
 st.subheader("📊 Análisis Visual de Rentabilidad")
 
+# plotly se importa aquí, con los KPIs ya en pantalla
+from graficos import exportacion_instalada, fig_desglose, fig_drilldown, imagen_png  # noqa: E402
+
+# Figuras cacheadas por resultados (las mismas que llena el precalentamiento)
+figuras = precarga.figuras(df_proy, df_real, escenarios if modo_escenarios else None)
+
+
+def boton_png(fig, file_name, key):
+    """Botón para descargar el gráfico como PNG; kaleido se carga solo si se pide la imagen"""
+    if not st.toggle("📸 Exportar como imagen PNG", value=not CARGA_DIFERIDA, key=f"exportar_{key}"):
+        return
+    img_bytes = imagen_png(fig)
+    if img_bytes is not None:
+        st.download_button(
+            label="📸 Descargar gráfico como imagen PNG",
+            data=img_bytes,
+            file_name=file_name,
+            mime="image/png",
+            key=key
+        )
+    elif exportacion_instalada():
+        st.warning("⚠️ No se pudo generar la imagen. Intenta de nuevo en unos minutos.")
+    else:
+        st.info("💡 Instala 'kaleido' para exportar gráficos: pip install kaleido")
+
+
 # Crear tabs para diferentes visualizaciones
 if modo_escenarios:
     tab1, tab2, tab3, tab4 = st.tabs(["📈 Comparación Escenarios", "💹 Desglose Financiero", "🎯 Márgenes", "📊 Rango de Resultados"])
@@ -294,298 +389,48 @@ else:
     tab1, tab2, tab3 = st.tabs(["📈 Utilidad Neta", "💹 Desglose Financiero", "🎯 Márgenes"])
 
 with tab1:
-    if modo_escenarios:
-        # Gráfico comparando los 3 escenarios
-        fig1 = go.Figure()
-        
-        # Escenario Optimista
-        fig1.add_trace(go.Scatter(
-            x=df_optimista["Mes"],
-            y=df_optimista["Utilidad neta"],
-            mode='lines+markers',
-            name='Optimista',
-            line=dict(color='#28a745', width=3),
-            marker=dict(size=8, symbol='circle')
-        ))
-        
-        # Escenario Realista
-        fig1.add_trace(go.Scatter(
-            x=df_realista["Mes"],
-            y=df_realista["Utilidad neta"],
-            mode='lines+markers',
-            name='Realista',
-            line=dict(color='#17a2b8', width=3),
-            marker=dict(size=8, symbol='square')
-        ))
-        
-        # Escenario Pesimista
-        fig1.add_trace(go.Scatter(
-            x=df_pesimista["Mes"],
-            y=df_pesimista["Utilidad neta"],
-            mode='lines+markers',
-            name='Pesimista',
-            line=dict(color='#dc3545', width=3),
-            marker=dict(size=8, symbol='diamond')
-        ))
-        
-        # Agregar banda de incertidumbre
-        fig1.add_trace(go.Scatter(
-            x=df_optimista["Mes"].tolist() + df_pesimista["Mes"].tolist()[::-1],
-            y=df_optimista["Utilidad neta"].tolist() + df_pesimista["Utilidad neta"].tolist()[::-1],
-            fill='toself',
-            fillcolor='rgba(128,128,128,0.2)',
-            line=dict(color='rgba(255,255,255,0)'),
-            showlegend=True,
-            name='Rango de variación'
-        ))
-        
-        fig1.update_layout(
-            title="Utilidad Neta Mensual: Análisis de Escenarios",
-            xaxis_title="Mes",
-            yaxis_title="Utilidad Neta ($)",
-            hovermode='x unified',
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(size=12),
-            height=500,
-            showlegend=True,
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="right",
-                x=1
-            )
-        )
-        
-    else:
-        # Gráfico de líneas mejorado (versión normal)
-        fig1 = go.Figure()
-        
-        # Línea proyectada
-        fig1.add_trace(go.Scatter(
-            x=df_proy["Mes"],
-            y=df_proy["Utilidad neta"],
-            mode='lines+markers',
-            name='Proyectado',
-            line=dict(color='#00cc96', width=3),
-            marker=dict(size=10, symbol='circle'),
-            fill='tozeroy',
-            fillcolor='rgba(0, 204, 150, 0.1)'
-        ))
-        
-        # Si hay datos reales, agregarlos
-        if df_real is not None:
-            fig1.add_trace(go.Scatter(
-                x=df_real["Mes"],
-                y=df_real["Utilidad neta"],
-                mode='lines+markers',
-                name='Real',
-                line=dict(color='#ef553b', width=3, dash='dash'),
-                marker=dict(size=10, symbol='square')
-            ))
-        
-        fig1.update_layout(
-            title="Utilidad Neta Mensual: Proyección vs Real",
-            xaxis_title="Mes",
-            yaxis_title="Utilidad Neta ($)",
-            hovermode='x unified',
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(size=12),
-            height=500,
-            showlegend=True,
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="right",
-                x=1
-            )
-        )
-    
-    fig1.update_xaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
-    fig1.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+    # Comparación de los 3 escenarios o línea de utilidad neta (versión normal)
+    fig1 = figuras["utilidad_neta"]
     
     st.plotly_chart(fig1, config={}, use_container_width=True, key="chart1")
 
     #st.plotly_chart(fig1, width="stretch", key="chart1")
     
     # Botón para exportar gráfico
-    try:
-        img_bytes = fig1.to_image(format="png", width=1200, height=600, scale=2)
-        st.download_button(
-            label="📸 Descargar gráfico como imagen PNG",
-            data=img_bytes,
-            file_name="utilidad_neta_proyeccion.png",
-            mime="image/png"
-        )
-    except:
-        st.info("💡 Instala 'kaleido' para exportar gráficos: pip install kaleido")
+    boton_png(fig1, "utilidad_neta_proyeccion.png", "download1")
 
 with tab2:
     # Gráfico de cascada/barras apiladas
-    fig2 = go.Figure()
-    
-    df_display = df_realista if modo_escenarios else df_proy
-    
-    fig2.add_trace(go.Bar(
-        x=df_display["Mes"],
-        y=df_display["Ventas"],
-        name='Ventas',
-        marker_color='lightblue'
-    ))
-    
-    fig2.add_trace(go.Bar(
-        x=df_display["Mes"],
-        y=df_display["Costo de ventas"],
-        name='Costo de ventas',
-        marker_color='lightcoral'
-    ))
-    
-    fig2.add_trace(go.Bar(
-        x=df_display["Mes"],
-        y=df_display["Gastos operativos"],
-        name='Gastos operativos',
-        marker_color='lightsalmon'
-    ))
-    
-    fig2.add_trace(go.Scatter(
-        x=df_display["Mes"],
-        y=df_display["Utilidad neta"],
-        name='Utilidad neta',
-        mode='lines+markers',
-        line=dict(color='green', width=3),
-        marker=dict(size=10)
-    ))
-    
-    fig2.update_layout(
-        title="Desglose de Ingresos y Gastos",
-        xaxis_title="Mes",
-        yaxis_title="Monto ($)",
-        barmode='group',
-        hovermode='x unified',
-        height=500,
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)'
-    )
+    fig2 = figuras["desglose"]
     
     #st.plotly_chart(fig2, width="stretch", key="chart2")
     st.plotly_chart(fig2, config={}, use_container_width=True, key="chart2")
     
     # Botón para exportar gráfico
-    try:
-        img_bytes = fig2.to_image(format="png", width=1200, height=600, scale=2)
-        st.download_button(
-            label="📸 Descargar gráfico como imagen PNG",
-            data=img_bytes,
-            file_name="desglose_financiero.png",
-            mime="image/png",
-            key="download2"
-        )
-    except:
-        pass
+    boton_png(fig2, "desglose_financiero.png", "download2")
 
 with tab3:
     # Gráfico de márgenes
-    df_display = df_realista if modo_escenarios else df_proy
-    df_display["Margen bruto (%)"] = (df_display["Utilidad bruta"] / df_display["Ventas"]) * 100
-    df_display["Margen neto (%)"] = (df_display["Utilidad neta"] / df_display["Ventas"]) * 100
-    
-    fig3 = go.Figure()
-    
-    fig3.add_trace(go.Scatter(
-        x=df_display["Mes"],
-        y=df_display["Margen bruto (%)"],
-        mode='lines+markers',
-        name='Margen Bruto',
-        line=dict(color='#636efa', width=2),
-        fill='tozeroy'
-    ))
-    
-    fig3.add_trace(go.Scatter(
-        x=df_display["Mes"],
-        y=df_display["Margen neto (%)"],
-        mode='lines+markers',
-        name='Margen Neto',
-        line=dict(color='#00cc96', width=2),
-        fill='tozeroy'
-    ))
-    
-    fig3.update_layout(
-        title="Evolución de Márgenes de Rentabilidad",
-        xaxis_title="Mes",
-        yaxis_title="Margen (%)",
-        hovermode='x unified',
-        height=500,
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)'
-    )
+    fig3 = figuras["margenes"]
     
     #st.plotly_chart(fig3, width="stretch", key="chart3")
     st.plotly_chart(fig3, config={}, use_container_width=True, key="chart3")
     
     # Botón para exportar gráfico
-    try:
-        img_bytes = fig3.to_image(format="png", width=1200, height=600, scale=2)
-        st.download_button(
-            label="📸 Descargar gráfico como imagen PNG",
-            data=img_bytes,
-            file_name="margenes_rentabilidad.png",
-            mime="image/png",
-            key="download3"
-        )
-    except:
-        pass
+    boton_png(fig3, "margenes_rentabilidad.png", "download3")
 
 # Tab adicional solo para modo escenarios
 if modo_escenarios:
     with tab4:
         # Gráfico de caja (box plot) mostrando rango de resultados
-        fig4 = go.Figure()
-        
-        meses = df_realista["Mes"].tolist()
-        
-        for i, mes in enumerate(meses):
-            valores = [
-                df_pesimista.iloc[i]["Utilidad neta"],
-                df_realista.iloc[i]["Utilidad neta"],
-                df_optimista.iloc[i]["Utilidad neta"]
-            ]
-            
-            fig4.add_trace(go.Box(
-                y=valores,
-                name=mes,
-                marker_color='lightblue',
-                boxmean='sd'
-            ))
-        
-        fig4.update_layout(
-            title="Rango de Utilidad Neta por Mes según Escenarios",
-            xaxis_title="Mes",
-            yaxis_title="Utilidad Neta ($)",
-            height=500,
-            showlegend=False,
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)'
-        )
+        fig4 = figuras["rango_escenarios"]
         
         #st.plotly_chart(fig4, width="stretch", key="chart4")
         st.plotly_chart(fig4, config={}, use_container_width=True, key="chart4")
 
         
         # Botón para exportar gráfico
-        try:
-            img_bytes = fig4.to_image(format="png", width=1200, height=600, scale=2)
-            st.download_button(
-                label="📸 Descargar gráfico como imagen PNG",
-                data=img_bytes,
-                file_name="rango_escenarios.png",
-                mime="image/png",
-                key="download4"
-            )
-        except:
-            pass
+        boton_png(fig4, "rango_escenarios.png", "download4")
 
 # ==========================
 # Tabla de resultados mejorada
@@ -626,13 +471,10 @@ def format_percentage(val):
     except (ValueError, TypeError):
         return str(val)
 
-# Calcular márgenes para la tabla
-df_display_tabla["Margen bruto (%)"] = (df_display_tabla["Utilidad bruta"] / df_display_tabla["Ventas"]) * 100
-df_display_tabla["Margen neto (%)"] = (df_display_tabla["Utilidad neta"] / df_display_tabla["Ventas"]) * 100
-
-# Mostrar tabla completa con formato
-df_tabla = df_display_tabla.copy()
-df_tabla = df_tabla.set_index("Mes")
+# Calcular márgenes sobre una copia para no modificar los DataFrames de los escenarios
+df_tabla = df_display_tabla.set_index("Mes")
+df_tabla["Margen bruto (%)"] = (df_tabla["Utilidad bruta"] / df_tabla["Ventas"]) * 100
+df_tabla["Margen neto (%)"] = (df_tabla["Utilidad neta"] / df_tabla["Ventas"]) * 100
 
 # Aplicar formato condicional
 st.dataframe(
@@ -704,37 +546,7 @@ if modo_escenarios:
     
     with col2:
         # Gráfico de tornado para mostrar sensibilidad
-        fig_tornado = go.Figure()
-        
-        categorias = ['Utilidad Neta']
-        
-        fig_tornado.add_trace(go.Bar(
-            y=categorias,
-            x=[utilidad_real_total - utilidad_pes_total],
-            name='Riesgo a la baja',
-            orientation='h',
-            marker=dict(color='#dc3545'),
-            base=utilidad_pes_total
-        ))
-        
-        fig_tornado.add_trace(go.Bar(
-            y=categorias,
-            x=[utilidad_opt_total - utilidad_real_total],
-            name='Potencial al alza',
-            orientation='h',
-            marker=dict(color='#28a745'),
-            base=utilidad_real_total
-        ))
-        
-        fig_tornado.update_layout(
-            title="Diagrama de Sensibilidad - Utilidad Anual",
-            xaxis_title="Utilidad Neta ($)",
-            barmode='stack',
-            height=250,
-            showlegend=True,
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)'
-        )
+        fig_tornado = figuras["sensibilidad"]
         
         #st.plotly_chart(fig_tornado, width="stretch", key="tornado")
         st.plotly_chart(fig_tornado, config={}, use_container_width=True, key="tornado")
@@ -757,46 +569,112 @@ else:
             st.warning(f"**{peor_mes['Mes']}** con ${peor_mes['Utilidad neta']:,.0f} de utilidad neta")
 
 # ==========================
-# Descargar como Excel
+# Consolidación: roll-ups y drill-down
 # ==========================
-st.markdown("---")
-st.subheader("📥 Exportar Resultados")
+if archivo_jerarquia is not None:
+    st.markdown("---")
+    st.subheader("🏢 Consolidación por Jerarquía")
+
+    # La consolidación se arma una vez por archivo y se guarda en la sesión;
+    # las ediciones posteriores solo actualizan la entidad y sus ancestros.
+    if st.session_state.get("consolidacion_id") != archivo_jerarquia.file_id:
+        try:
+            consolidacion = Consolidacion(pd.read_csv(BytesIO(archivo_jerarquia.getvalue())))
+            st.session_state["consolidacion"] = consolidacion
+            st.session_state["consolidacion_tabla"] = consolidacion.tabla_supuestos(SUPUESTOS_NUMERICOS)
+        except ValueError as e:
+            st.error(f"❌ {e}")
+            st.session_state["consolidacion"] = None
+        st.session_state["consolidacion_id"] = archivo_jerarquia.file_id
+        st.session_state["consolidacion_eventos"] = (None, "suma")
+    consolidacion = st.session_state.get("consolidacion")
+
+    if consolidacion is not None:
+        # Los eventos dirigidos a entidades solo se reaplican si cambió el calendario
+        clave_eventos = (
+            None if calendario_eventos is None
+            else int(pd.util.hash_pandas_object(calendario_eventos, index=False).sum()),
+            modo_eventos,
+        )
+        if st.session_state.get("consolidacion_eventos") != clave_eventos:
+            consolidacion.aplicar_eventos(calendario_eventos, modo_eventos)
+            st.session_state["consolidacion_eventos"] = clave_eventos
+
+        with st.expander("✏️ Editar supuestos por entidad"):
+            tabla_editada = st.data_editor(
+                st.session_state["consolidacion_tabla"],
+                disabled=[consolidacion.niveles[0]],
+                hide_index=True,
+                key="editor_consolidacion"
+            )
+            tabla_editada = tabla_editada.fillna({c: SUPUESTOS_DEFAULT[c] for c in SUPUESTOS_NUMERICOS})
+            tabla_actual = consolidacion.tabla_supuestos(SUPUESTOS_NUMERICOS)
+            cambios = (tabla_editada[SUPUESTOS_NUMERICOS] != tabla_actual[SUPUESTOS_NUMERICOS]).any(axis=1)
+            for fila in tabla_editada[cambios].to_dict("records"):
+                entidad = fila.pop(consolidacion.niveles[0])
+                consolidacion.actualizar_entidad(entidad, fila)
+            if cambios.any():
+                st.caption(f"🔄 {int(cambios.sum())} entidades actualizadas")
+
+        col1, col2 = st.columns(2)
+        nivel_consolidacion = col1.selectbox("Nivel", consolidacion.niveles[::-1], key="nivel_consolidacion")
+        nodo_consolidacion = col2.selectbox(
+            nivel_consolidacion, consolidacion.nodos(nivel_consolidacion), key="nodo_consolidacion"
+        )
 
-@st.cache_data
-def to_excel(proy, real=None, escenarios=None):
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        if escenarios:
-            escenarios['optimista'].to_excel(writer, sheet_name="Escenario Optimista", index=False)
-            escenarios['realista'].to_excel(writer, sheet_name="Escenario Realista", index=False)
-            escenarios['pesimista'].to_excel(writer, sheet_name="Escenario Pesimista", index=False)
+        # Ruta desde la raíz hasta el nodo
+        ruta = [nodo_consolidacion]
+        nivel_padre, nodo_padre = consolidacion.padre(nivel_consolidacion, nodo_consolidacion)
+        while nivel_padre is not None:
+            ruta.insert(0, nodo_padre)
+            nivel_padre, nodo_padre = consolidacion.padre(nivel_padre, nodo_padre)
+        st.caption(" › ".join(ruta))
+
+        df_nodo = consolidacion.a_dataframe(nivel_consolidacion, nodo_consolidacion)
+        ventas_nodo = df_nodo["Ventas"].sum()
+        utilidad_nodo = df_nodo["Utilidad neta"].sum()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("💵 Ventas totales (12m)", f"${ventas_nodo:,.0f}")
+        col2.metric("💰 Utilidad neta (12m)", f"${utilidad_nodo:,.0f}")
+        col3.metric("📈 Margen neto", f"{(utilidad_nodo / ventas_nodo * 100) if ventas_nodo > 0 else 0:.1f}%")
+
+        if nivel_consolidacion != consolidacion.niveles[0]:
+            linea_consolidacion = st.radio(
+                "Línea a desglosar:", ["Utilidad neta", "Ventas", "EBIT"],
+                horizontal=True, key="linea_consolidacion"
+            )
+            fig_consolidacion = fig_drilldown(
+                nodo_consolidacion,
+                consolidacion.dataframes_hijos(nivel_consolidacion, nodo_consolidacion, linea_consolidacion),
+                linea_consolidacion
+            )
         else:
-            proy.to_excel(writer, sheet_name="Proyección", index=False)
-        
-        if real is not None:
-            real.to_excel(writer, sheet_name="Datos reales", index=False)
-    return output.getvalue()
+            fig_consolidacion = fig_desglose(df_nodo)
+        st.plotly_chart(fig_consolidacion, config={}, use_container_width=True, key="chart_consolidacion")
 
-if modo_escenarios:
-    escenarios_dict = {
-        'optimista': df_optimista,
-        'realista': df_realista,
-        'pesimista': df_pesimista
-    }
-    excel_data = to_excel(None, df_real, escenarios_dict)
-else:
-    excel_data = to_excel(df_proy, df_real)
+# ==========================
+# Descargar como Excel
+# ==========================
+st.markdown("---")
+st.subheader("📥 Exportar Resultados")
 
 col1, col2 = st.columns(2)
 
 with col1:
-    st.download_button(
-        label="📥 Descargar resultados como Excel (.xlsx)",
-        data=excel_data,
-        file_name="pronostico_financiero_completo.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        use_container_width=True
-    )
+    # openpyxl solo se carga cuando se pide el archivo
+    if st.toggle("Preparar archivo Excel", value=not CARGA_DIFERIDA, key="exportar_excel"):
+        if modo_escenarios:
+            excel_data = precarga.excel(None, df_real, escenarios)
+        else:
+            excel_data = precarga.excel(df_proy, df_real)
+
+        st.download_button(
+            label="📥 Descargar resultados como Excel (.xlsx)",
+            data=excel_data,
+            file_name="pronostico_financiero_completo.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            use_container_width=True
+        )
 
 with col2:
     if modo_escenarios:
@@ -804,6 +682,38 @@ with col2:
     else:
         st.info("📊 El archivo incluye la proyección completa")
 
+# Exportación columnar: una sola tabla larga (escenario, entidad, periodo, línea),
+# mucho más rápida que el Excel para lotes grandes y lista para el almacén de datos
+col1, col2 = st.columns(2)
+
+with col1:
+    # pyarrow solo se carga cuando se pide el archivo
+    if st.toggle("Preparar Parquet / Arrow", value=not CARGA_DIFERIDA, key="exportar_columnar"):
+        from exportacion import FORMATOS
+
+        # Cacheado por los resultados: solo se vuelve a escribir si cambian
+        resultados = escenarios if modo_escenarios else {"realista": df_proy}
+        consolidacion = st.session_state.get("consolidacion") if archivo_jerarquia is not None else None
+        if consolidacion is not None:
+            archivos_columnares = precarga.columnar(resultados, df_real, consolidacion.hojas(),
+                                                    np.asarray(consolidacion.nodos(consolidacion.niveles[0])))
+        else:
+            archivos_columnares = precarga.columnar(resultados, df_real)
+
+        for formato, (nombre_archivo, mime) in FORMATOS.items():
+            st.download_button(
+                label=f"📥 Descargar como {formato.capitalize()}",
+                data=archivos_columnares[formato],
+                file_name=nombre_archivo,
+                mime=mime,
+                key=f"descargar_{formato}",
+                use_container_width=True
+            )
+
+with col2:
+    st.info("🗄️ Formato largo: escenario, entidad, periodo, línea y valor"
+            + (", con las entidades de la consolidación" if archivo_jerarquia is not None else ""))
+
 # ==========================
 # Instrucciones
 # ==========================
@@ -819,7 +729,7 @@ with st.expander("ℹ️ ¿Cómo usar esta herramienta?"):
     
     **2. Funciones avanzadas:**
     - **Estacionalidad**: Activa esta opción si tu negocio tiene variaciones estacionales (ej: retail en diciembre)
-    - **Eventos especiales**: Agrega promociones, campañas o eventos que impacten ventas en meses específicos
+    - **Eventos especiales**: Agrega promociones, campañas o eventos que impacten ventas en meses específicos, a mano o con un calendario (CSV o Excel) con miles de eventos
     - **🎭 Análisis de escenarios**: Activa para ver proyecciones optimistas, realistas y pesimistas simultáneamente
     
     **3. Análisis de escenarios:**
@@ -829,7 +739,9 @@ with st.expander("ℹ️ ¿Cómo usar esta herramienta?"):
     - Útil para: planificación estratégica, análisis de riesgos, presentaciones a inversionistas
     
     **4. Exportar gráficos:**
-    - Cada gráfico tiene un botón "📸 Descargar gráfico como imagen PNG"
+    - Activa "📸 Exportar como imagen PNG" bajo el gráfico y usa el botón "📸 Descargar gráfico como imagen PNG"
+    - Lo mismo con "Preparar archivo Excel" para descargar los resultados
+    - "Preparar Parquet / Arrow" exporta escenarios, datos reales y entidades de la consolidación en una sola tabla larga (escenario, entidad, periodo, línea, valor)
     - Las imágenes son de alta resolución (1200x600px)
     - Perfectas para presentaciones, reportes e informes ejecutivos
     - **Nota**: Requiere la librería `kaleido` instalada (`pip install kaleido`)
@@ -851,8 +763,33 @@ with st.expander("ℹ️ ¿Cómo usar esta herramienta?"):
     | Ene | 48000  | 28800          | 19000            | 950                |
     | Feb | 52000  | 31200          | 19500            | 950                |
     
-    - **Mes**: Ene, Feb, Mar, Abr, May, Jun, Jul, Ago, Sep, Oct, Nov, Dic
-    - **Valores**: Solo números (sin símbolos $, comas ni texto)
+    - **Mes**: Ene, Feb, Mar, ... Dic, el nombre completo (Enero), el número (1-12) o una fecha
+    - **Valores**: Solo números (sin comas ni texto); se ignora el símbolo $
+    - Las filas pueden venir en cualquier orden; si un mes se repite, sus filas se suman
+    - Las filas con errores se descartan y se listan en el reporte de validación
+    
+    ### 🎯 Formato del calendario de eventos
+    
+    | Fecha | Impacto | Entidad | Escenario |
+    |-------|---------|---------|-----------|
+    | 2025-11-28 | 35 | Tienda 1 |          |
+    | 2025-12-15 | -10 |         | pesimista |
+    
+    - **Fecha** (o **Mes**): el mes del evento; si el calendario abarca varios años se elige el año en la barra lateral
+    - **Impacto**: % sobre las ventas del mes (mínimo -100%)
+    - **Entidad** y **Escenario** son opcionales; vacíos aplican a todos. Los eventos por entidad se usan en la consolidación
+    - Los eventos de un mismo mes se suman o se componen según la opción elegida
+    
+    ### 🏢 Formato del archivo de consolidación (CSV)
+    
+    | Entidad | Region | Empresa | ventas_base | crecimiento |
+    |---------|--------|---------|-------------|-------------|
+    | Tienda 1 | Norte | Grupo A | 48000      | 0.03        |
+    | Tienda 2 | Sur   | Grupo A | 52000      | 0.02        |
+    
+    - Una fila por entidad; cada región pertenece a una sola empresa
+    - Las columnas de supuestos son opcionales (`ventas_base`, `crecimiento`, `costo_venta_pct`, `gastos_operativos`, `gastos_financieros`, `tasa_impuestos`); las celdas vacías usan los valores por defecto
+    - Al editar los supuestos de una entidad solo se recalculan esa entidad y sus totales de región y empresa
     
     ### 💡 Casos de uso recomendados
     
@@ -895,7 +832,7 @@ with st.expander("🔧 Solución de problemas"):
     ### Otros problemas comunes
     
     - **Gráficos no se muestran**: Verifica que tengas instalado `plotly` actualizado
-    - **Archivo Excel no carga**: Asegúrate que las columnas coincidan exactamente con los nombres requeridos
+    - **Archivo Excel no carga**: Asegúrate que las columnas coincidan exactamente con los nombres requeridos; revisa el reporte de validación en la barra lateral
     - **Números extraños**: Revisa que los datos no contengan texto o símbolos
     """)
 
@@ -907,4 +844,11 @@ st.markdown("""
     <p>Desarrollada para análisis de rentabilidad y planificación estratégica</p>
     <p style='font-size: 0.8em;'>💡 Tip: Ajusta los supuestos en tiempo real y observa el impacto inmediato en tus proyecciones</p>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+# ==========================
+# Instrumentación de memoria
+# ==========================
+reporte_memoria = memoria.medir_rerun(st.session_state)
+if memoria.ADMIN_ACTIVO:
+    memoria.mostrar_admin(reporte_memoria)
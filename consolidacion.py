@@ -0,0 +1,194 @@
+"""Consolidación jerárquica de proyecciones (entidad -> región -> empresa).
+
+La jerarquía es una tabla con una fila por entidad y una columna por nivel
+(de la hoja a la raíz), más columnas opcionales con los supuestos de cada
+entidad (las de modelo.SUPUESTOS_DEFAULT):
+
+    Entidad, Region, Empresa, ventas_base, crecimiento, ...
+
+Las proyecciones de todas las entidades se calculan en lote y cada nivel
+se arma con una suma vectorizada por grupos. Un calendario de eventos (ver
+eventos.py) puede dirigir eventos a entidades concretas. Al cambiar los
+supuestos de una entidad solo se recalcula esa hoja y se suma la
+diferencia a sus ancestros, sin volver a agregar el árbol completo.
+"""
+import numpy as np
+import pandas as pd
+
+from eventos import matriz_eventos
+from modelo import COLUMNAS, MESES, proyectar_lote, supuestos_desde_tabla, validar_supuestos
+
+NIVELES = ["Entidad", "Region", "Empresa"]
+
+# Hijos que se grafican por separado en el drill-down; el resto va a "Otros"
+MAX_HIJOS_GRAFICO = 15
+
+
+def validar_jerarquia(jerarquia, niveles=NIVELES):
+    """Verifica columnas, entidades únicas y que cada nodo tenga un solo padre"""
+    faltantes = [nivel for nivel in niveles if nivel not in jerarquia.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas de la jerarquía: {', '.join(faltantes)}")
+
+    tabla = jerarquia[niveles]
+    if tabla.isna().any().any():
+        raise ValueError("La jerarquía tiene celdas vacías")
+
+    hojas = tabla[niveles[0]].astype(str)
+    repetidas = hojas[hojas.duplicated()].unique()
+    if len(repetidas):
+        raise ValueError(f"Entidades repetidas: {', '.join(repetidas[:10])}")
+
+    for hijo, padre in zip(niveles[1:-1], niveles[2:]):
+        padres = tabla.groupby(hijo)[padre].nunique()
+        ambiguos = padres[padres > 1].index.astype(str)
+        if len(ambiguos):
+            raise ValueError(f"{hijo} con más de un {padre}: {', '.join(ambiguos[:10])}")
+
+
+def _a_dataframe(valores):
+    df = pd.DataFrame({"Mes": MESES})
+    for j, columna in enumerate(COLUMNAS):
+        df[columna] = valores[j].copy()
+    return df
+
+
+class Consolidacion:
+    """Proyecciones por entidad y sus roll-ups por nivel de la jerarquía.
+
+    Los valores de cada nodo son una matriz (len(COLUMNAS), 12) con las
+    líneas del estado de resultados por mes.
+    """
+
+    def __init__(self, jerarquia, niveles=NIVELES):
+        validar_jerarquia(jerarquia, niveles)
+        self.niveles = list(niveles)
+        self.jerarquia = jerarquia[self.niveles].astype(str).reset_index(drop=True)
+        self._supuestos = [validar_supuestos(s) for s in supuestos_desde_tabla(jerarquia)]
+        self._factores_eventos = np.ones((len(self.jerarquia), len(MESES)))
+
+        # Código de grupo de cada hoja en cada nivel
+        self._codigos = {}
+        self._nombres = {}
+        self._indices = {}
+        for nivel in self.niveles:
+            codigos, nombres = pd.factorize(self.jerarquia[nivel], sort=nivel != self.niveles[0])
+            self._codigos[nivel] = codigos
+            self._nombres[nivel] = list(nombres)
+            self._indices[nivel] = {nombre: i for i, nombre in enumerate(nombres)}
+
+        self.recalcular()
+
+    def _proyectar(self, lista_supuestos, factores_eventos):
+        matrices = proyectar_lote(lista_supuestos, factores_eventos=factores_eventos)
+        return np.stack([matrices[columna] for columna in COLUMNAS], axis=1)
+
+    def recalcular(self):
+        """Recalcula todas las hojas y todos los roll-ups desde cero"""
+        self._hojas = self._proyectar(self._supuestos, self._factores_eventos)
+        n = len(self._hojas)
+        planas = pd.DataFrame(self._hojas.reshape(n, -1))
+        self._totales = {}
+        for nivel in self.niveles[1:]:
+            sumas = planas.groupby(self._codigos[nivel], sort=True).sum().to_numpy()
+            self._totales[nivel] = sumas.reshape(len(self._nombres[nivel]), len(COLUMNAS), len(MESES))
+
+    def actualizar_entidad(self, entidad, supuestos):
+        """Cambia los supuestos de una entidad y propaga la diferencia a sus ancestros.
+
+        Devuelve la lista de (nivel, nombre) de los nodos actualizados.
+        """
+        hoja = self.niveles[0]
+        if entidad not in self._indices[hoja]:
+            raise KeyError(f"Entidad desconocida: {entidad}")
+        i = self._indices[hoja][entidad]
+
+        supuestos = validar_supuestos(supuestos)
+        nuevo = self._proyectar([supuestos], self._factores_eventos[i:i + 1])[0]
+        delta = nuevo - self._hojas[i]
+        self._supuestos[i] = supuestos
+        self._hojas[i] = nuevo
+
+        actualizados = [(hoja, entidad)]
+        for nivel in self.niveles[1:]:
+            codigo = self._codigos[nivel][i]
+            self._totales[nivel][codigo] += delta
+            actualizados.append((nivel, self._nombres[nivel][codigo]))
+        return actualizados
+
+    def aplicar_eventos(self, calendario, modo="suma"):
+        """Aplica un calendario de eventos a las entidades y recalcula todo.
+
+        Los eventos con Escenario se aplican solo si son del realista.
+        """
+        filas = pd.DataFrame({"Entidad": self.jerarquia[self.niveles[0]], "Escenario": "realista"})
+        self._factores_eventos = matriz_eventos(calendario, filas, modo)
+        self.recalcular()
+
+    def tabla_supuestos(self, columnas):
+        """Supuestos actuales de todas las entidades como DataFrame"""
+        tabla = pd.DataFrame(self._supuestos, columns=columnas)
+        tabla.insert(0, self.niveles[0], self.jerarquia[self.niveles[0]])
+        return tabla
+
+    def nodos(self, nivel):
+        """Nombres de los nodos de un nivel"""
+        return list(self._nombres[nivel])
+
+    def valores(self, nivel, nombre):
+        """Matriz (líneas, meses) de un nodo"""
+        i = self._indices[nivel][nombre]
+        if nivel == self.niveles[0]:
+            return self._hojas[i]
+        return self._totales[nivel][i]
+
+    def hojas(self):
+        """Valores de todas las entidades en un solo arreglo (entidades, COLUMNAS, meses)"""
+        return self._hojas
+
+    def matrices(self):
+        """Matrices (entidades, meses) de cada línea, como las de modelo.proyectar_lote"""
+        return {columna: self._hojas[:, j, :] for j, columna in enumerate(COLUMNAS)}
+
+    def a_dataframe(self, nivel, nombre):
+        """Estado de resultados de un nodo con el mismo formato que modelo.a_dataframe"""
+        return _a_dataframe(self.valores(nivel, nombre))
+
+    def dataframes_hijos(self, nivel, nombre, columna="Utilidad neta", max_hijos=MAX_HIJOS_GRAFICO):
+        """DataFrames de los hijos de un nodo para el drill-down.
+
+        Si hay más de `max_hijos`, los de menor aporte absoluto en `columna`
+        se suman en un único hijo "Otros".
+        """
+        nivel_hijo, hijos = self.hijos(nivel, nombre)
+        resto = []
+        if len(hijos) > max_hijos:
+            j = COLUMNAS.index(columna)
+            aporte = {hijo: abs(self.valores(nivel_hijo, hijo)[j].sum()) for hijo in hijos}
+            hijos = sorted(hijos, key=aporte.get, reverse=True)
+            hijos, resto = hijos[:max_hijos], hijos[max_hijos:]
+
+        dataframes = {hijo: self.a_dataframe(nivel_hijo, hijo) for hijo in hijos}
+        if resto:
+            dataframes[f"Otros ({len(resto)})"] = _a_dataframe(
+                sum(self.valores(nivel_hijo, hijo) for hijo in resto)
+            )
+        return dataframes
+
+    def hijos(self, nivel, nombre):
+        """Nivel inmediato inferior y los nombres de los hijos de un nodo"""
+        k = self.niveles.index(nivel)
+        if k == 0:
+            return None, []
+        nivel_hijo = self.niveles[k - 1]
+        filas = self.jerarquia[nivel] == nombre
+        return nivel_hijo, sorted(self.jerarquia.loc[filas, nivel_hijo].unique())
+
+    def padre(self, nivel, nombre):
+        """Nivel y nombre del padre de un nodo (None en la raíz)"""
+        k = self.niveles.index(nivel)
+        if k == len(self.niveles) - 1:
+            return None, None
+        nivel_padre = self.niveles[k + 1]
+        fila = self.jerarquia.index[self.jerarquia[nivel] == nombre][0]
+        return nivel_padre, self.jerarquia.at[fila, nivel_padre]
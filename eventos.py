@@ -0,0 +1,118 @@
+"""Motor de eventos especiales (promociones, campañas, cierres...).
+
+Un calendario de eventos (ver validacion.normalizar_calendario) tiene una
+fila por evento con su periodo (0..11), su impacto sobre las ventas (como
+fracción) y, opcionalmente, la Entidad y el Escenario a los que aplica
+(vacío = a todos). matriz_eventos lo convierte en una matriz de factores
+(filas, 12) que multiplica las ventas en modelo.proyectar_lote.
+
+Los eventos se acumulan con np.bincount por (combinación de etiquetas,
+mes) y el resultado se reparte a las filas, así que el tiempo crece
+linealmente con el número de eventos más el número de filas. Los eventos
+de un mismo mes y fila se suman (modo "suma": 1 + Σ impacto) o se
+componen (modo "compuesto": Π (1 + impacto)).
+"""
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+from modelo import MESES
+
+DIMENSIONES = ["Entidad", "Escenario"]
+MODOS = ("suma", "compuesto")
+
+
+def calendario_manual(meses, impactos):
+    """Calendario con los eventos cargados a mano (mes, impacto en %)"""
+    return pd.DataFrame({
+        "periodo": np.array([MESES.index(mes) for mes in meses], dtype=np.int64),
+        "anio": np.nan,
+        "impacto": np.asarray(impactos, dtype=float) / 100,
+        "Entidad": None,
+        "Escenario": None,
+    })
+
+
+def anios(calendario):
+    """Años presentes en el calendario (los eventos sin año aplican a todos)"""
+    return sorted(calendario["anio"].dropna().astype(int).unique().tolist())
+
+
+def filtrar_anio(calendario, anio):
+    """Eventos del año indicado más los que no tienen año"""
+    if anio is None:
+        return calendario
+    return calendario[calendario["anio"].isna() | (calendario["anio"] == anio)]
+
+
+def _codigos(filas, calendario, claves, mascara):
+    """Código de combinación de `claves` para cada fila y cada evento seleccionado.
+
+    Los eventos cuya combinación no está en las filas reciben -1. Sin claves,
+    todas las filas y eventos comparten la combinación 0.
+    """
+    if not claves:
+        return np.zeros(len(filas), dtype=np.int64), np.zeros(int(mascara.sum()), dtype=np.int64), 1
+    codigo_fila, unicas = pd.factorize(pd.MultiIndex.from_frame(filas[claves]))
+    codigo_evento = unicas.get_indexer(
+        pd.MultiIndex.from_arrays([calendario[d].to_numpy()[mascara] for d in claves])
+    )
+    return codigo_fila, codigo_evento, len(unicas)
+
+
+def matriz_eventos(calendario, filas, modo="suma"):
+    """Factores de ventas (len(filas), 12) a partir de un calendario.
+
+    `filas` es un DataFrame con una fila por fila de la proyección y las
+    columnas de DIMENSIONES que la identifican (p. ej. Escenario para los
+    tres escenarios o Entidad para una consolidación). Los eventos dirigidos
+    a una dimensión que `filas` no tiene no se aplican.
+    """
+    if modo not in MODOS:
+        raise ValueError(f"modo debe ser uno de: {', '.join(MODOS)}")
+
+    n, m = len(filas), len(MESES)
+    if calendario is None or calendario.empty:
+        return np.ones((n, m))
+
+    filas = filas.reset_index(drop=True)
+    dimensiones = [d for d in DIMENSIONES if d in calendario.columns]
+    especificadas = {d: calendario[d].notna().to_numpy() for d in dimensiones}
+
+    aplicables = np.ones(len(calendario), dtype=bool)
+    for d in dimensiones:
+        if d not in filas.columns:
+            aplicables &= ~especificadas[d]
+    dimensiones = [d for d in dimensiones if d in filas.columns]
+
+    periodo = calendario["periodo"].to_numpy()
+    impacto = calendario["impacto"].to_numpy(dtype=float)
+    if modo == "compuesto":
+        # log(0) = -inf: un evento de -100% (o menos) deja el mes en cero
+        with np.errstate(divide="ignore"):
+            impacto = np.log1p(np.maximum(impacto, -1))
+
+    # Un grupo por combinación de dimensiones especificadas. Cada grupo se
+    # acumula sobre sus combinaciones únicas (no sobre las filas) y luego se
+    # reparte a las filas, así un evento "para todas las entidades" cuesta
+    # lo mismo que uno dirigido a una sola.
+    acumulado = np.zeros((n, m))
+    for patron in product((True, False), repeat=len(dimensiones)):
+        mascara = aplicables.copy()
+        for d, especificada in zip(dimensiones, patron):
+            mascara &= especificadas[d] == especificada
+        if not mascara.any():
+            continue
+
+        claves = [d for d, especificada in zip(dimensiones, patron) if especificada]
+        codigo_fila, codigo_evento, k = _codigos(filas, calendario, claves, mascara)
+        encontrados = codigo_evento >= 0
+        posiciones = codigo_evento[encontrados] * m + periodo[mascara][encontrados]
+        por_combinacion = np.bincount(posiciones, weights=impacto[mascara][encontrados], minlength=k * m)
+        acumulado += por_combinacion.reshape(k, m)[codigo_fila]
+
+    if modo == "compuesto":
+        return np.exp(acumulado)
+    # Las ventas no pueden quedar negativas aunque los descuentos sumen más de -100%
+    return np.maximum(1 + acumulado, 0)
@@ -0,0 +1,124 @@
+"""Exportación columnar (Parquet y Arrow IPC) de proyecciones y datos reales.
+
+Todas las proyecciones, escenarios y datos reales van a una sola tabla en
+formato largo con un esquema tipado (ESQUEMA): una fila por escenario,
+entidad, periodo y línea del estado de resultados. Las etiquetas son
+columnas de diccionario (cada valor distinto se guarda una vez) y los
+valores salen de las matrices de modelo.proyectar_lote con una sola
+copia, sin pasar por DataFrames.
+
+El Excel de la app sigue disponible; esta exportación es la que conviene
+para lotes grandes de escenarios y entidades y para cargar en el almacén
+de datos.
+"""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from modelo import COLUMNAS, MESES
+
+ESQUEMA = pa.schema([
+    pa.field("escenario", pa.dictionary(pa.int8(), pa.string()), nullable=False),
+    pa.field("entidad", pa.dictionary(pa.int32(), pa.string())),
+    pa.field("periodo", pa.int8(), nullable=False),
+    pa.field("linea", pa.dictionary(pa.int8(), pa.string()), nullable=False),
+    pa.field("valor", pa.float64()),
+])
+
+FORMATOS = {
+    "parquet": ("pronostico_financiero.parquet", "application/vnd.apache.parquet"),
+    "arrow": ("pronostico_financiero.arrow", "application/vnd.apache.arrow.file"),
+}
+
+
+def _diccionario(etiquetas, tipo_indice):
+    """Códigos y valores únicos de una lista de etiquetas (None = nulo)"""
+    codigos, unicos = pd.factorize(pd.Series(etiquetas, dtype=object), use_na_sentinel=True)
+    return codigos.astype(tipo_indice.to_pandas_dtype()), pa.array(list(unicos), type=pa.string())
+
+
+def tabla_lote(matrices, escenarios, entidades=None, periodos=None, columnas=COLUMNAS):
+    """Tabla larga a partir de las matrices (n, meses) de proyectar_lote.
+
+    `escenarios` y `entidades` tienen una etiqueta por fila de las matrices
+    (entidades=None deja la entidad nula). `periodos` son los números de mes
+    (1..12) de las columnas; por defecto los 12 meses. Las filas quedan
+    ordenadas por línea, fila y periodo, así cada matriz se copia una sola
+    vez a la columna de valores.
+    """
+    n = len(escenarios)
+    if periodos is None:
+        periodos = np.arange(1, len(MESES) + 1)
+    periodos = np.asarray(periodos, dtype=np.int8)
+    m = len(periodos)
+    filas_por_linea = n * m
+
+    valor = np.empty(len(columnas) * filas_por_linea)
+    for j, columna in enumerate(columnas):
+        matriz = np.asarray(matrices[columna], dtype=float)
+        valor[j * filas_por_linea:(j + 1) * filas_por_linea].reshape(n, m)[:] = matriz
+
+    codigos_escenario, dic_escenario = _diccionario(escenarios, pa.int8())
+    if entidades is None:
+        entidad = pa.nulls(len(valor), type=ESQUEMA.field("entidad").type)
+    else:
+        codigos_entidad, dic_entidad = _diccionario(entidades, pa.int32())
+        indices = pa.array(np.tile(np.repeat(codigos_entidad, m), len(columnas)),
+                           mask=np.tile(np.repeat(codigos_entidad < 0, m), len(columnas)))
+        entidad = pa.DictionaryArray.from_arrays(indices, dic_entidad)
+
+    return pa.Table.from_arrays([
+        pa.DictionaryArray.from_arrays(np.tile(np.repeat(codigos_escenario, m), len(columnas)), dic_escenario),
+        entidad,
+        pa.array(np.tile(periodos, n * len(columnas))),
+        pa.DictionaryArray.from_arrays(
+            np.repeat(np.arange(len(columnas), dtype=np.int8), filas_por_linea),
+            pa.array(list(columnas), type=pa.string()),
+        ),
+        pa.array(valor),
+    ], schema=ESQUEMA)
+
+
+def tabla_resultados(escenarios, df_real=None, entidad=None):
+    """Tabla larga de los DataFrames de la app.
+
+    `escenarios` es un dict nombre -> DataFrame de 12 meses (p. ej. el de
+    modelo.calcular_escenarios o {"realista": df_proy}). Los datos reales,
+    si los hay, van como escenario "real" con los meses que tengan.
+    """
+    nombres = list(escenarios)
+    matrices = {c: np.stack([escenarios[e][c].to_numpy(dtype=float) for e in nombres]) for c in COLUMNAS}
+    entidades = None if entidad is None else [entidad] * len(nombres)
+    tablas = [tabla_lote(matrices, nombres, entidades)]
+
+    if df_real is not None:
+        periodos = [MESES.index(mes) + 1 for mes in df_real["Mes"]]
+        reales = {c: df_real[c].to_numpy(dtype=float)[None, :] for c in COLUMNAS}
+        tablas.append(tabla_lote(reales, ["real"], None if entidad is None else [entidad], periodos))
+
+    return unir(tablas)
+
+
+def tabla_consolidacion(consolidacion):
+    """Tabla larga de todas las entidades de una consolidacion.Consolidacion (escenario realista)"""
+    entidades = consolidacion.nodos(consolidacion.niveles[0])
+    return tabla_lote(consolidacion.matrices(), ["realista"] * len(entidades), entidades)
+
+
+def unir(tablas):
+    """Concatena tablas de ESQUEMA con diccionarios comunes (Arrow IPC no admite reemplazarlos)"""
+    return pa.concat_tables(tablas).unify_dictionaries().combine_chunks()
+
+
+def escribir(tabla, formato):
+    """Bytes del archivo Parquet (zstd) o Arrow IPC (lz4) de la tabla"""
+    salida = pa.BufferOutputStream()
+    if formato == "parquet":
+        pq.write_table(tabla, salida, compression="zstd")
+    elif formato == "arrow":
+        with pa.ipc.new_file(salida, tabla.schema, options=pa.ipc.IpcWriteOptions(compression="lz4")) as escritor:
+            escritor.write_table(tabla)
+    else:
+        raise ValueError(f"formato debe ser uno de: {', '.join(FORMATOS)}")
+    return salida.getvalue().to_pybytes()
@@ -0,0 +1,428 @@
+"""Constructores de las figuras de Plotly del pronóstico.
+
+Cada función recibe los DataFrames de modelo.py y devuelve un go.Figure
+sin efectos secundarios, para usarlas igual desde app.py y desde el
+pipeline de reportes (reportes.py).
+
+Cada figura viaja como JSON al navegador en cada rerun, así que se arman
+para que pesen poco: los valores van redondeados a la precisión que se
+muestra y como arreglos numpy (Plotly los envía en binario, con el entero
+más chico que alcance), la plantilla es una sola, recortada a los tipos
+de traza que se usan, y ninguna serie se envía dos veces (salvo el
+contorno de la banda de escenarios, que es su propia traza).
+scripts/bytes_rerun.py mide los bytes enviados por rerun.
+"""
+import logging
+import time
+from functools import lru_cache
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+# Tamaño de las imágenes exportadas (PNG/SVG)
+OPCIONES_IMAGEN = {"width": 1200, "height": 600, "scale": 2}
+
+_LEYENDA_HORIZONTAL = dict(
+    orientation="h",
+    yanchor="bottom",
+    y=1.02,
+    xanchor="right",
+    x=1
+)
+
+
+# Tipos de traza de estos gráficos: la plantilla solo lleva sus valores por defecto
+_TIPOS_TRAZA = ("bar", "box", "scatter")
+# Escalas de color de la plantilla que ningún gráfico usa
+_DISENO_SIN_USO = ("coloraxis", "colorscale")
+
+_INT32_MAX = np.iinfo(np.int32).max
+
+_log = logging.getLogger(__name__)
+
+
+# Sin kaleido o sin Chrome la exportación queda desactivada hasta reiniciar;
+# otros errores (p. ej. un timeout de kaleido) la pausan REINTENTO_EXPORTACION_S
+# segundos: cada intento fallido deja vivos los hilos de choreographer.
+REINTENTO_EXPORTACION_S = 300
+_exportacion_instalada = True
+_reintentar_exportacion = 0.0
+
+
+def _falta_instalacion(error):
+    """True si el error es por kaleido o Chrome no instalados"""
+    if isinstance(error, ImportError) or type(error).__name__ in ("ChromeNotFoundError", "BrowserDepsError"):
+        return True
+    # plotly traduce ambos casos a ValueError/RuntimeError con este texto
+    mensaje = str(error)
+    return isinstance(error, (ValueError, RuntimeError)) and (
+        "requires the Kaleido package" in mensaje or "requires Google Chrome" in mensaje
+    )
+
+
+def exportacion_instalada():
+    """False si kaleido o Chrome no están instalados (según el último intento)"""
+    return _exportacion_instalada
+
+
+def imagen_png(fig):
+    """Bytes PNG de la figura, o None si no se puede exportar"""
+    global _exportacion_instalada, _reintentar_exportacion
+    if not _exportacion_instalada or time.monotonic() < _reintentar_exportacion:
+        return None
+    try:
+        return fig.to_image(format="png", **OPCIONES_IMAGEN)
+    except Exception as e:
+        if _falta_instalacion(e):
+            _exportacion_instalada = False
+        else:
+            _log.warning("No se pudo exportar el gráfico (se reintenta en %ss): %s", REINTENTO_EXPORTACION_S, e)
+            _reintentar_exportacion = time.monotonic() + REINTENTO_EXPORTACION_S
+        return None
+
+
+@lru_cache(maxsize=None)
+def _plantilla(nombre):
+    """Plantilla `nombre` de Plotly recortada a lo que usan estos gráficos"""
+    base = pio.templates[nombre].to_plotly_json()
+    return go.layout.Template(
+        data={tipo: trazas for tipo, trazas in base.get("data", {}).items() if tipo in _TIPOS_TRAZA},
+        layout={k: v for k, v in base.get("layout", {}).items() if k not in _DISENO_SIN_USO},
+    )
+
+
+def _figura():
+    """Figura vacía con la plantilla recortada (la completa pesa más que los datos)"""
+    return go.Figure(layout={"template": _plantilla(pio.templates.default)})
+
+
+def _montos(valores):
+    """Montos redondeados a la unidad, como enteros si alcanzan en int32"""
+    valores = np.round(np.asarray(valores, dtype=float))
+    if np.isfinite(valores).all() and np.abs(valores).max(initial=0) <= _INT32_MAX:
+        # Plotly reduce los int64 al entero más chico que alcance (i1/i2/i4)
+        return valores.astype(np.int64)
+    return valores
+
+
+def _porcentajes(valores):
+    """Porcentajes con un decimal, en float32"""
+    return np.round(np.asarray(valores, dtype=float), 1).astype(np.float32)
+
+
+def _grilla(fig):
+    fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+    fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+    return fig
+
+
+def fig_utilidad_neta(df_proy, df_real=None):
+    """Utilidad neta mensual proyectada, con los datos reales si los hay"""
+    fig = _figura()
+
+    # Línea proyectada
+    fig.add_trace(go.Scatter(
+        x=df_proy["Mes"],
+        y=_montos(df_proy["Utilidad neta"]),
+        mode='lines+markers',
+        name='Proyectado',
+        line=dict(color='#00cc96', width=3),
+        marker=dict(size=10, symbol='circle'),
+        fill='tozeroy',
+        fillcolor='rgba(0, 204, 150, 0.1)'
+    ))
+
+    # Si hay datos reales, agregarlos
+    if df_real is not None:
+        fig.add_trace(go.Scatter(
+            x=df_real["Mes"],
+            y=_montos(df_real["Utilidad neta"]),
+            mode='lines+markers',
+            name='Real',
+            line=dict(color='#ef553b', width=3, dash='dash'),
+            marker=dict(size=10, symbol='square')
+        ))
+
+    fig.update_layout(
+        title="Utilidad Neta Mensual: Proyección vs Real",
+        xaxis_title="Mes",
+        yaxis_title="Utilidad Neta ($)",
+        hovermode='x unified',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(size=12),
+        height=500,
+        showlegend=True,
+        legend=_LEYENDA_HORIZONTAL
+    )
+    return _grilla(fig)
+
+
+def fig_utilidad_neta_escenarios(escenarios):
+    """Utilidad neta mensual de los 3 escenarios con la banda de variación"""
+    df_optimista = escenarios["optimista"]
+    df_realista = escenarios["realista"]
+    df_pesimista = escenarios["pesimista"]
+
+    fig = _figura()
+
+    # La banda de variación es una traza propia (en su grupo de leyenda),
+    # así se oculta desde la leyenda sin ocultar la línea optimista.
+    # legendrank mantiene el orden de la leyenda: Optimista, Realista,
+    # Pesimista y la banda.
+    fig.add_trace(go.Scatter(
+        x=df_optimista["Mes"].tolist() + df_pesimista["Mes"].tolist()[::-1],
+        y=_montos(np.concatenate([df_optimista["Utilidad neta"], df_pesimista["Utilidad neta"][::-1]])),
+        mode='none',
+        fill='toself',
+        fillcolor='rgba(128,128,128,0.2)',
+        name='Rango de variación',
+        legendgroup='rango',
+        hoverinfo='skip',
+        legendrank=4
+    ))
+
+    # Escenario Optimista
+    fig.add_trace(go.Scatter(
+        x=df_optimista["Mes"],
+        y=_montos(df_optimista["Utilidad neta"]),
+        mode='lines+markers',
+        name='Optimista',
+        line=dict(color='#28a745', width=3),
+        marker=dict(size=8, symbol='circle'),
+        legendrank=1
+    ))
+
+    # Escenario Realista
+    fig.add_trace(go.Scatter(
+        x=df_realista["Mes"],
+        y=_montos(df_realista["Utilidad neta"]),
+        mode='lines+markers',
+        name='Realista',
+        line=dict(color='#17a2b8', width=3),
+        marker=dict(size=8, symbol='square'),
+        legendrank=2
+    ))
+
+    # Escenario Pesimista
+    fig.add_trace(go.Scatter(
+        x=df_pesimista["Mes"],
+        y=_montos(df_pesimista["Utilidad neta"]),
+        mode='lines+markers',
+        name='Pesimista',
+        line=dict(color='#dc3545', width=3),
+        marker=dict(size=8, symbol='diamond'),
+        legendrank=3
+    ))
+
+    fig.update_layout(
+        title="Utilidad Neta Mensual: Análisis de Escenarios",
+        xaxis_title="Mes",
+        yaxis_title="Utilidad Neta ($)",
+        hovermode='x unified',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(size=12),
+        height=500,
+        showlegend=True,
+        legend=_LEYENDA_HORIZONTAL
+    )
+    return _grilla(fig)
+
+
+def fig_desglose(df_display):
+    """Barras de ventas, costos y gastos con la línea de utilidad neta"""
+    fig = _figura()
+
+    fig.add_trace(go.Bar(
+        x=df_display["Mes"],
+        y=_montos(df_display["Ventas"]),
+        name='Ventas',
+        marker_color='lightblue'
+    ))
+
+    fig.add_trace(go.Bar(
+        x=df_display["Mes"],
+        y=_montos(df_display["Costo de ventas"]),
+        name='Costo de ventas',
+        marker_color='lightcoral'
+    ))
+
+    fig.add_trace(go.Bar(
+        x=df_display["Mes"],
+        y=_montos(df_display["Gastos operativos"]),
+        name='Gastos operativos',
+        marker_color='lightsalmon'
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=df_display["Mes"],
+        y=_montos(df_display["Utilidad neta"]),
+        name='Utilidad neta',
+        mode='lines+markers',
+        line=dict(color='green', width=3),
+        marker=dict(size=10)
+    ))
+
+    fig.update_layout(
+        title="Desglose de Ingresos y Gastos",
+        xaxis_title="Mes",
+        yaxis_title="Monto ($)",
+        barmode='group',
+        hovermode='x unified',
+        height=500,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig
+
+
+def fig_margenes(df_display):
+    """Evolución del margen bruto y neto (%)"""
+    margen_bruto = _porcentajes(df_display["Utilidad bruta"] / df_display["Ventas"] * 100)
+    margen_neto = _porcentajes(df_display["Utilidad neta"] / df_display["Ventas"] * 100)
+
+    fig = _figura()
+
+    fig.add_trace(go.Scatter(
+        x=df_display["Mes"],
+        y=margen_bruto,
+        mode='lines+markers',
+        name='Margen Bruto',
+        line=dict(color='#636efa', width=2),
+        fill='tozeroy'
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=df_display["Mes"],
+        y=margen_neto,
+        mode='lines+markers',
+        name='Margen Neto',
+        line=dict(color='#00cc96', width=2),
+        fill='tozeroy'
+    ))
+
+    fig.update_layout(
+        title="Evolución de Márgenes de Rentabilidad",
+        xaxis_title="Mes",
+        yaxis_title="Margen (%)",
+        yaxis_hoverformat=".1f",
+        hovermode='x unified',
+        height=500,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig
+
+
+def fig_rango_escenarios(escenarios):
+    """Box plot por mes con el rango de utilidad neta entre escenarios"""
+    df_optimista = escenarios["optimista"]
+    df_realista = escenarios["realista"]
+    df_pesimista = escenarios["pesimista"]
+
+    fig = _figura()
+
+    # Una sola traza agrupada por mes (x) en lugar de una caja por mes
+    fig.add_trace(go.Box(
+        x=np.tile(df_realista["Mes"].to_numpy(), 3),
+        y=_montos(np.concatenate([
+            df_pesimista["Utilidad neta"].to_numpy(),
+            df_realista["Utilidad neta"].to_numpy(),
+            df_optimista["Utilidad neta"].to_numpy(),
+        ])),
+        marker_color='lightblue',
+        boxmean='sd'
+    ))
+
+    fig.update_layout(
+        title="Rango de Utilidad Neta por Mes según Escenarios",
+        xaxis_title="Mes",
+        yaxis_title="Utilidad Neta ($)",
+        height=500,
+        showlegend=False,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig
+
+
+def fig_sensibilidad(escenarios):
+    """Diagrama de sensibilidad de la utilidad neta anual"""
+    utilidad_opt_total = round(float(escenarios["optimista"]["Utilidad neta"].sum()))
+    utilidad_real_total = round(float(escenarios["realista"]["Utilidad neta"].sum()))
+    utilidad_pes_total = round(float(escenarios["pesimista"]["Utilidad neta"].sum()))
+
+    fig = _figura()
+
+    categorias = ['Utilidad Neta']
+
+    fig.add_trace(go.Bar(
+        y=categorias,
+        x=[utilidad_real_total - utilidad_pes_total],
+        name='Riesgo a la baja',
+        orientation='h',
+        marker=dict(color='#dc3545'),
+        base=utilidad_pes_total
+    ))
+
+    fig.add_trace(go.Bar(
+        y=categorias,
+        x=[utilidad_opt_total - utilidad_real_total],
+        name='Potencial al alza',
+        orientation='h',
+        marker=dict(color='#28a745'),
+        base=utilidad_real_total
+    ))
+
+    fig.update_layout(
+        title="Diagrama de Sensibilidad - Utilidad Anual",
+        xaxis_title="Utilidad Neta ($)",
+        barmode='stack',
+        height=250,
+        showlegend=True,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig
+
+
+def fig_drilldown(nombre, hijos, columna="Utilidad neta"):
+    """Aporte de cada hijo de un nodo de la jerarquía, con el total del nodo.
+
+    `hijos` es un dict nombre -> DataFrame con el formato de modelo.a_dataframe.
+    """
+    fig = _figura()
+
+    total = None
+    for hijo, df in hijos.items():
+        fig.add_trace(go.Bar(
+            x=df["Mes"],
+            y=_montos(df[columna]),
+            name=hijo
+        ))
+        total = df[columna] if total is None else total + df[columna]
+
+    if total is not None:
+        fig.add_trace(go.Scatter(
+            x=next(iter(hijos.values()))["Mes"],
+            y=_montos(total),
+            name=f"Total {nombre}",
+            mode='lines+markers',
+            line=dict(color='black', width=3),
+            marker=dict(size=8)
+        ))
+
+    fig.update_layout(
+        title=f"{columna} de {nombre} por componente",
+        xaxis_title="Mes",
+        yaxis_title=f"{columna} ($)",
+        barmode='relative',
+        hovermode='x unified',
+        height=500,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        legend=_LEYENDA_HORIZONTAL
+    )
+    return fig
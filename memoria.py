@@ -0,0 +1,246 @@
+"""Instrumentación de memoria de la app.
+
+Mide, en cada rerun, el tamaño del session_state de la sesión, el tamaño
+y número de entradas de los cachés de @st.cache_data y @st.cache_resource,
+el RSS del proceso y (si PRONOSTICO_TRACEMALLOC=1) los principales
+asignadores de memoria según tracemalloc respecto al rerun anterior.
+
+La vista de administración se muestra con PRONOSTICO_ADMIN=1.
+scripts/soak_memoria.py usa estas mismas funciones para verificar que la
+memoria se mantiene acotada tras miles de reruns.
+"""
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import types
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+ADMIN_ACTIVO = os.environ.get("PRONOSTICO_ADMIN") == "1"
+TRACEMALLOC_ACTIVO = os.environ.get("PRONOSTICO_TRACEMALLOC") == "1"
+TOP_ASIGNADORES = 10
+
+# Sesiones sin reruns en este tiempo se descartan del registro
+EXPIRACION_SESION_S = 3600
+MAX_SESIONES_REGISTRADAS = 1000
+# Medir el session_state completo es caro (~0.3 s con una consolidación de
+# 20k entidades): sin la vista de administración se mide a lo sumo una vez
+# cada INTERVALO_MEDICION_S por sesión
+INTERVALO_MEDICION_S = 60
+
+_lock = threading.Lock()
+_sesiones = {}
+_ultimo_snapshot = None
+_ultimos_asignadores = []
+
+# Objetos cuyos atributos no son datos de la sesión (el código y sus globales)
+_SIN_ATRIBUTOS = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def tamano_profundo(obj, _vistos=None):
+    """Tamaño aproximado en bytes de un objeto y de lo que contiene"""
+    if _vistos is None:
+        _vistos = set()
+    if id(obj) in _vistos:
+        return 0
+    _vistos.add(id(obj))
+
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        uso = obj.memory_usage(deep=True)
+        return int(uso.sum() if isinstance(obj, pd.DataFrame) else uso)
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return len(obj)
+
+    tamano = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        tamano += sum(tamano_profundo(k, _vistos) + tamano_profundo(v, _vistos) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        tamano += sum(tamano_profundo(x, _vistos) for x in obj)
+    elif not isinstance(obj, _SIN_ATRIBUTOS):
+        # Objetos propios (p. ej. una Consolidacion): se siguen sus atributos
+        if hasattr(obj, "__dict__"):
+            tamano += tamano_profundo(vars(obj), _vistos)
+        for clase in type(obj).__mro__:
+            slots = getattr(clase, "__slots__", ())
+            for nombre in [slots] if isinstance(slots, str) else slots:
+                if nombre not in ("__dict__", "__weakref__") and hasattr(obj, nombre):
+                    tamano += tamano_profundo(getattr(obj, nombre), _vistos)
+    return tamano
+
+
+def rss_bytes():
+    """Memoria residente del proceso (o el pico, si no hay /proc)"""
+    try:
+        with open("/proc/self/statm") as f:
+            paginas = int(f.read().split()[1])
+        return paginas * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss viene en KB en Linux y en bytes en macOS
+        return pico if sys.platform == "darwin" else pico * 1024
+
+
+def estadisticas_cache():
+    """Entradas y bytes de cada función decorada con @st.cache_data o @st.cache_resource"""
+    from streamlit.runtime.caching import cache_data_api, cache_resource_api
+
+    resultado = []
+    try:
+        # Streamlit solo expone estadísticas agrupadas; las cachés por
+        # función dan una entrada por resultado guardado.
+        for tipo, registro in (("cache_data", cache_data_api._data_caches),
+                               ("cache_resource", cache_resource_api._resource_caches)):
+            with registro._caches_lock:
+                caches = list(registro._function_caches.values())
+            for cache in caches:
+                stats = cache.get_stats()
+                resultado.append({
+                    "cache": cache.display_name,
+                    "tipo": tipo,
+                    "entradas": len(stats),
+                    "bytes": sum(s.byte_length for s in stats),
+                    "max_entradas": cache.max_entries,
+                    "ttl_s": cache.ttl_seconds,
+                })
+    except AttributeError:
+        resultado = []
+        for tipo, proveedor in (("cache_data", cache_data_api.get_data_cache_stats_provider()),
+                                ("cache_resource", cache_resource_api.get_resource_cache_stats_provider())):
+            for stat in proveedor.get_stats():
+                resultado.append({
+                    "cache": stat.cache_name,
+                    "tipo": tipo,
+                    "entradas": None,
+                    "bytes": stat.byte_length,
+                    "max_entradas": None,
+                    "ttl_s": None,
+                })
+    return resultado
+
+
+def registrar_sesion(session_id, session_state, medir=True):
+    """Guarda el tamaño del session_state de una sesión y poda las inactivas.
+
+    Con medir=False el tamaño se recalcula solo si la última medición de la
+    sesión tiene más de INTERVALO_MEDICION_S segundos.
+    """
+    ahora = time.time()
+    with _lock:
+        anterior = _sesiones.get(session_id)
+    if medir or anterior is None or ahora - anterior["medido"] >= INTERVALO_MEDICION_S:
+        tamano, medido = sum(tamano_profundo(session_state[k]) for k in list(session_state.keys())), ahora
+    else:
+        tamano, medido = anterior["bytes"], anterior["medido"]
+    info = {
+        "bytes": tamano,
+        "claves": len(session_state.keys()),
+        "actualizado": ahora,
+        "medido": medido,
+    }
+    with _lock:
+        anterior = _sesiones.get(session_id)
+        info["reruns"] = (anterior["reruns"] if anterior else 0) + 1
+        _sesiones[session_id] = info
+
+        for sid in [s for s, v in _sesiones.items() if ahora - v["actualizado"] > EXPIRACION_SESION_S]:
+            del _sesiones[sid]
+        if len(_sesiones) > MAX_SESIONES_REGISTRADAS:
+            antiguas = sorted(_sesiones, key=lambda s: _sesiones[s]["actualizado"])
+            for sid in antiguas[:len(_sesiones) - MAX_SESIONES_REGISTRADAS]:
+                del _sesiones[sid]
+    return info
+
+
+def resumen_sesiones():
+    with _lock:
+        sesiones = list(_sesiones.values())
+    tamanos = [s["bytes"] for s in sesiones]
+    return {
+        "sesiones": len(sesiones),
+        "bytes_total": sum(tamanos),
+        "bytes_max": max(tamanos, default=0),
+    }
+
+
+def iniciar_tracemalloc():
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+if TRACEMALLOC_ACTIVO:
+    iniciar_tracemalloc()
+
+
+def _comparar_snapshot():
+    """Top de asignadores (archivo:línea) respecto al snapshot anterior"""
+    global _ultimo_snapshot, _ultimos_asignadores
+
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ])
+    with _lock:
+        anterior, _ultimo_snapshot = _ultimo_snapshot, snapshot
+        if anterior is None:
+            diferencias = snapshot.statistics("lineno")
+            top = [(str(s.traceback), s.size, s.count) for s in diferencias[:TOP_ASIGNADORES]]
+        else:
+            diferencias = snapshot.compare_to(anterior, "lineno")
+            top = [(str(s.traceback), s.size_diff, s.count_diff) for s in diferencias[:TOP_ASIGNADORES]]
+        _ultimos_asignadores = [
+            {"ubicacion": ubicacion, "bytes": tamano, "bloques": bloques}
+            for ubicacion, tamano, bloques in top
+        ]
+    return _ultimos_asignadores
+
+
+def medir_rerun(session_state):
+    """Mide la memoria al final de un rerun y devuelve el reporte completo"""
+    # El contexto no debe quedar en una variable global del script: retiene
+    # el namespace de cada rerun y el RSS crece ~0.8 MB por rerun.
+    ctx = get_script_run_ctx()
+    reporte = {
+        "sesion": registrar_sesion(ctx.session_id if ctx else "local", session_state, medir=ADMIN_ACTIVO),
+        "sesiones": resumen_sesiones(),
+        # Medir las figuras cacheadas toma ~0.1 s: solo para la vista de administración
+        "caches": estadisticas_cache() if ADMIN_ACTIVO else [],
+        "rss_bytes": rss_bytes(),
+        "tracemalloc_bytes": None,
+        "asignadores": [],
+    }
+    if tracemalloc.is_tracing():
+        reporte["tracemalloc_bytes"] = tracemalloc.get_traced_memory()[0]
+        reporte["asignadores"] = _comparar_snapshot()
+    return reporte
+
+
+def mostrar_admin(reporte):
+    """Vista de administración con el reporte de memoria del rerun"""
+    with st.expander("🧠 Memoria (administración)"):
+        col1, col2, col3 = st.columns(3)
+        col1.metric("RSS del proceso", f"{reporte['rss_bytes'] / 2**20:,.1f} MB")
+        col2.metric("Session state (esta sesión)", f"{reporte['sesion']['bytes'] / 1024:,.1f} KB",
+                    delta=f"{reporte['sesion']['claves']} claves", delta_color="off")
+        col3.metric("Sesiones activas", f"{reporte['sesiones']['sesiones']}",
+                    delta=f"{reporte['sesiones']['bytes_total'] / 1024:,.1f} KB en total", delta_color="off")
+
+        st.markdown("**Cachés (`@st.cache_data` y `@st.cache_resource`):**")
+        if reporte["caches"]:
+            st.dataframe(pd.DataFrame(reporte["caches"]), width="stretch")
+        else:
+            st.write("Sin entradas en caché")
+
+        st.markdown("**Principales asignadores (tracemalloc, diferencia con el rerun anterior):**")
+        if reporte["asignadores"]:
+            st.dataframe(pd.DataFrame(reporte["asignadores"]), width="stretch")
+        else:
+            st.write("Activa `PRONOSTICO_TRACEMALLOC=1` para ver los asignadores por rerun")
@@ -0,0 +1,198 @@
+"""Modelo de proyección del estado de resultados (12 meses).
+
+No depende de Streamlit: lo usan tanto app.py como el servicio HTTP (api.py).
+Los supuestos se pasan como un dict con las mismas claves y unidades que la
+barra lateral de la app (ver SUPUESTOS_DEFAULT).
+"""
+from numbers import Real
+
+import numpy as np
+import pandas as pd
+
+MESES = ["Ene", "Feb", "Mar", "Abr", "May", "Jun", "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"]
+
+COLUMNAS = [
+    "Ventas",
+    "Costo de ventas",
+    "Utilidad bruta",
+    "Gastos operativos",
+    "EBIT",
+    "Gastos financieros",
+    "Utilidad antes de impuestos",
+    "Impuestos",
+    "Utilidad neta",
+]
+
+# Valores por defecto de la barra lateral.
+# crecimiento es una fracción (0.03 = 3%); costo_venta_pct y tasa_impuestos van en %.
+SUPUESTOS_DEFAULT = {
+    "ventas_base": 50000.0,
+    "crecimiento": 0.03,
+    "costo_venta_pct": 60.0,
+    "gastos_operativos": 20000.0,
+    "gastos_financieros": 1000.0,
+    "tasa_impuestos": 25.0,
+    "factores_estacionalidad": None,
+    "eventos": None,
+}
+
+SUPUESTOS_NUMERICOS = [k for k, v in SUPUESTOS_DEFAULT.items() if v is not None]
+
+ESCENARIOS = ["optimista", "realista", "pesimista"]
+
+VARIACION_OPTIMISTA_DEFAULT = 20.0
+VARIACION_PESIMISTA_DEFAULT = -20.0
+
+
+def validar_supuestos(supuestos):
+    """Completa los supuestos con los valores por defecto y valida tipos y claves"""
+    if supuestos is None:
+        supuestos = {}
+    if not isinstance(supuestos, dict):
+        raise ValueError("Los supuestos deben ser un objeto")
+
+    desconocidas = set(supuestos) - set(SUPUESTOS_DEFAULT)
+    if desconocidas:
+        raise ValueError(f"Supuestos desconocidos: {', '.join(sorted(desconocidas))}")
+
+    resultado = dict(SUPUESTOS_DEFAULT)
+    for clave in SUPUESTOS_NUMERICOS:
+        if clave in supuestos:
+            valor = supuestos[clave]
+            if isinstance(valor, bool) or not isinstance(valor, Real):
+                raise ValueError(f"'{clave}' debe ser numérico")
+            resultado[clave] = float(valor)
+
+    for clave in ("factores_estacionalidad", "eventos"):
+        valor = supuestos.get(clave)
+        if valor:
+            if not isinstance(valor, dict):
+                raise ValueError(f"'{clave}' debe ser un objeto mes -> valor")
+            meses_invalidos = set(valor) - set(MESES)
+            if meses_invalidos:
+                raise ValueError(f"Meses inválidos en '{clave}': {', '.join(sorted(meses_invalidos))}")
+            for mes, x in valor.items():
+                if isinstance(x, bool) or not isinstance(x, Real):
+                    raise ValueError(f"'{clave}' debe tener valores numéricos (mes {mes})")
+            resultado[clave] = {mes: float(x) for mes, x in valor.items()}
+    return resultado
+
+
+def supuestos_desde_tabla(df):
+    """Un dict de supuestos por fila de un DataFrame (las celdas vacías toman el valor por defecto)"""
+    columnas = [c for c in df.columns if c in SUPUESTOS_NUMERICOS]
+    if not columnas:
+        return [{} for _ in range(len(df))]
+    return [
+        {c: valor for c, valor in fila.items() if pd.notna(valor)}
+        for fila in df[columnas].to_dict("records")
+    ]
+
+
+def _vector_mensual(valores, neutro):
+    """Convierte un dict mes -> valor en un vector de 12 posiciones"""
+    vector = np.full(len(MESES), neutro, dtype=float)
+    if valores:
+        for mes, valor in valores.items():
+            vector[MESES.index(mes)] = valor
+    return vector
+
+
+def proyectar_lote(lista_supuestos, multiplicadores=None, factores_eventos=None):
+    """Calcula muchas proyecciones a la vez.
+
+    Devuelve un dict columna -> matriz (n, 12), una fila por juego de supuestos.
+    `multiplicadores` ajusta el crecimiento de cada fila (escenarios); por
+    defecto es 1.0 para todas. `factores_eventos` es una matriz (n, 12) que
+    multiplica las ventas (ver eventos.matriz_eventos). Los supuestos deben
+    venir ya validados.
+    """
+    n = len(lista_supuestos)
+    ventas_base = np.array([s["ventas_base"] for s in lista_supuestos], dtype=float)[:, None]
+    crecimiento = np.array([s["crecimiento"] for s in lista_supuestos], dtype=float)[:, None]
+    costo_pct = np.array([s["costo_venta_pct"] for s in lista_supuestos], dtype=float)[:, None]
+    gastos_op = np.array([s["gastos_operativos"] for s in lista_supuestos], dtype=float)[:, None]
+    gastos_fin = np.array([s["gastos_financieros"] for s in lista_supuestos], dtype=float)[:, None]
+    tasa = np.array([s["tasa_impuestos"] for s in lista_supuestos], dtype=float)[:, None]
+
+    if multiplicadores is None:
+        multiplicadores = np.ones((n, 1))
+    else:
+        multiplicadores = np.asarray(multiplicadores, dtype=float).reshape(n, 1)
+
+    # Factores mensuales: estacionalidad y eventos especiales
+    factores = np.ones((n, len(MESES)))
+    for i, s in enumerate(lista_supuestos):
+        if s["factores_estacionalidad"]:
+            factores[i] *= _vector_mensual(s["factores_estacionalidad"], 1.0)
+        if s["eventos"]:
+            # Misma regla que eventos.matriz_eventos: las ventas no quedan negativas
+            factores[i] *= np.maximum(1 + _vector_mensual(s["eventos"], 0.0), 0)
+    if factores_eventos is not None:
+        factores *= np.asarray(factores_eventos, dtype=float).reshape(n, len(MESES))
+
+    t = np.arange(len(MESES))
+    ventas = ventas_base * (1 + crecimiento * multiplicadores) ** t * factores
+    costo_venta = ventas * (costo_pct / 100)
+    utilidad_bruta = ventas - costo_venta
+    gastos_operativos = np.broadcast_to(gastos_op, ventas.shape)
+    gastos_financieros = np.broadcast_to(gastos_fin, ventas.shape)
+    ebit = utilidad_bruta - gastos_operativos
+    utilidad_antes_imp = ebit - gastos_financieros
+    impuestos = np.maximum(utilidad_antes_imp, 0) * (tasa / 100)
+    utilidad_neta = utilidad_antes_imp - impuestos
+
+    return {
+        "Ventas": ventas,
+        "Costo de ventas": costo_venta,
+        "Utilidad bruta": utilidad_bruta,
+        "Gastos operativos": gastos_operativos,
+        "EBIT": ebit,
+        "Gastos financieros": gastos_financieros,
+        "Utilidad antes de impuestos": utilidad_antes_imp,
+        "Impuestos": impuestos,
+        "Utilidad neta": utilidad_neta,
+    }
+
+
+def a_dataframe(matrices, fila=0):
+    """Arma el DataFrame de una fila de proyectar_lote, con la columna Mes"""
+    df = pd.DataFrame({"Mes": MESES})
+    for columna in COLUMNAS:
+        df[columna] = np.array(matrices[columna][fila], dtype=float)
+    return df
+
+
+def calcular_proyeccion(supuestos, multiplicador=1.0, factores_eventos=None):
+    """Calcula la proyección con un multiplicador para escenarios"""
+    supuestos = validar_supuestos(supuestos)
+    return a_dataframe(proyectar_lote([supuestos], [multiplicador], factores_eventos))
+
+
+def multiplicadores_escenarios(variacion_optimista=VARIACION_OPTIMISTA_DEFAULT,
+                               variacion_pesimista=VARIACION_PESIMISTA_DEFAULT):
+    """Multiplicadores de crecimiento de cada escenario"""
+    return dict(zip(ESCENARIOS, [1 + (variacion_optimista / 100), 1.0, 1 + (variacion_pesimista / 100)]))
+
+
+def calcular_escenarios(supuestos, variacion_optimista=VARIACION_OPTIMISTA_DEFAULT,
+                        variacion_pesimista=VARIACION_PESIMISTA_DEFAULT, factores_eventos=None):
+    """Calcula los 3 escenarios (optimista, realista, pesimista) en una sola pasada.
+
+    `factores_eventos`, si se da, es una matriz (3, 12) en el orden de ESCENARIOS.
+    """
+    supuestos = validar_supuestos(supuestos)
+    multiplicadores = multiplicadores_escenarios(variacion_optimista, variacion_pesimista)
+    matrices = proyectar_lote([supuestos] * 3, list(multiplicadores.values()), factores_eventos)
+    return {nombre: a_dataframe(matrices, i) for i, nombre in enumerate(multiplicadores)}
+
+
+def completar_reales(df_real, tasa_impuestos):
+    """Agrega al DataFrame de datos reales las líneas calculadas del estado de resultados"""
+    df_real = df_real.copy()
+    df_real["Utilidad bruta"] = df_real["Ventas"] - df_real["Costo de ventas"]
+    df_real["EBIT"] = df_real["Utilidad bruta"] - df_real["Gastos operativos"]
+    df_real["Utilidad antes de impuestos"] = df_real["EBIT"] - df_real["Gastos financieros"]
+    df_real["Impuestos"] = df_real["Utilidad antes de impuestos"].clip(lower=0) * (tasa_impuestos / 100)
+    df_real["Utilidad neta"] = df_real["Utilidad antes de impuestos"] - df_real["Impuestos"]
+    return df_real
@@ -0,0 +1,319 @@
+"""Cachés compartidos de la app y su precalentamiento al iniciar el servidor.
+
+Las proyecciones, las figuras y el Excel de la app se calculan con las
+funciones cacheadas de este módulo (no con funciones definidas en app.py:
+esas viven en __main__ y no se pueden llamar desde fuera del script). Así
+el precalentamiento llena exactamente las mismas entradas que luego lee
+la primera sesión:
+
+- los supuestos por defecto, con y sin modo escenarios,
+- los juegos de supuestos de PRONOSTICO_PRECARGA (un JSON con una lista
+  de objetos {"supuestos": {...}, "modo_escenarios": bool,
+  "variacion_optimista": x, "variacion_pesimista": y}),
+- los juegos más usados según el registro de uso: con
+  PRONOSTICO_REGISTRO_USO=ruta.jsonl la app anota los supuestos de cada
+  rerun y el precalentamiento toma los PRONOSTICO_PRECARGA_TOP más
+  frecuentes. Al superar PRONOSTICO_REGISTRO_USO_MAX_BYTES (5 MB) el
+  registro rota a ruta.jsonl.1, así se leen a lo sumo dos archivos.
+
+Los juegos inválidos del archivo o del registro se omiten con un aviso en
+el log.
+
+iniciar() corre precalentar() en un hilo, una sola vez por proceso.
+Solo scripts/servidor.py lo llama, antes de levantar Streamlit: con
+`streamlit run app.py` no hay precalentamiento, porque el hilo arrancaría
+dentro del primer rerun e importaría plotly, openpyxl y matplotlib en
+paralelo con él. Se repite cada PRONOSTICO_PRECARGA_INTERVALO segundos
+para que los juegos precalentados sigan entre los más recientes de cada
+caché y vuelvan a calcularse si fueron desalojados.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from io import BytesIO
+
+import pandas as pd
+import streamlit as st
+from streamlit import runtime
+
+from modelo import (
+    COLUMNAS,
+    SUPUESTOS_DEFAULT,
+    VARIACION_OPTIMISTA_DEFAULT,
+    VARIACION_PESIMISTA_DEFAULT,
+    calcular_escenarios,
+    calcular_proyeccion,
+    validar_supuestos,
+)
+
+RUTA_PRECARGA = os.environ.get("PRONOSTICO_PRECARGA")
+RUTA_REGISTRO_USO = os.environ.get("PRONOSTICO_REGISTRO_USO")
+TOP_REGISTRO_USO = int(os.environ.get("PRONOSTICO_PRECARGA_TOP", "20"))
+INTERVALO_S = float(os.environ.get("PRONOSTICO_PRECARGA_INTERVALO", "1800"))
+MAX_BYTES_REGISTRO_USO = int(os.environ.get("PRONOSTICO_REGISTRO_USO_MAX_BYTES", str(5 * 2**20)))
+
+# Los juegos precalentados (por defecto, configurados y los más usados)
+# más un margen para los que las sesiones calculan en vivo
+MAX_ENTRADAS = TOP_REGISTRO_USO + 12
+
+_log = logging.getLogger(__name__)
+_lock = threading.Lock()
+_hilo = None
+_ultimo_precalentamiento = {}
+
+
+# ==========================
+# Funciones cacheadas
+# ==========================
+@st.cache_data(max_entries=MAX_ENTRADAS)
+def _proyeccion(supuestos, factores_eventos):
+    return calcular_proyeccion(supuestos, 1.0, factores_eventos)
+
+
+@st.cache_data(max_entries=MAX_ENTRADAS)
+def _escenarios(supuestos, variacion_optimista, variacion_pesimista, factores_eventos):
+    return calcular_escenarios(supuestos, variacion_optimista, variacion_pesimista, factores_eventos)
+
+
+def proyeccion(supuestos, factores_eventos=None):
+    """Proyección del escenario base (cacheada)"""
+    return _proyeccion(validar_supuestos(supuestos), factores_eventos)
+
+
+def escenarios(supuestos, variacion_optimista=VARIACION_OPTIMISTA_DEFAULT,
+               variacion_pesimista=VARIACION_PESIMISTA_DEFAULT, factores_eventos=None):
+    """Los 3 escenarios (cacheados)"""
+    return _escenarios(validar_supuestos(supuestos), float(variacion_optimista),
+                       float(variacion_pesimista), factores_eventos)
+
+
+# Las figuras no se copian en cada lectura: st.plotly_chart no las modifica
+@st.cache_resource(max_entries=MAX_ENTRADAS)
+def figuras(df_proy, df_real=None, escenarios=None):
+    """Figuras de las pestañas, por nombre, para unos resultados"""
+    import graficos
+
+    if escenarios:
+        df_proy = escenarios["realista"]
+        resultado = {
+            "utilidad_neta": graficos.fig_utilidad_neta_escenarios(escenarios),
+            "rango_escenarios": graficos.fig_rango_escenarios(escenarios),
+            "sensibilidad": graficos.fig_sensibilidad(escenarios),
+        }
+    else:
+        resultado = {"utilidad_neta": graficos.fig_utilidad_neta(df_proy, df_real)}
+    resultado["desglose"] = graficos.fig_desglose(df_proy)
+    resultado["margenes"] = graficos.fig_margenes(df_proy)
+    return resultado
+
+
+# Acotado para que los bytes de cada libro no queden en memoria para siempre
+@st.cache_data(max_entries=32, ttl=3600)
+def excel(proy, real=None, escenarios=None):
+    """Bytes del libro Excel con la proyección (o los 3 escenarios) y los datos reales"""
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        if escenarios:
+            escenarios['optimista'].to_excel(writer, sheet_name="Escenario Optimista", index=False)
+            escenarios['realista'].to_excel(writer, sheet_name="Escenario Realista", index=False)
+            escenarios['pesimista'].to_excel(writer, sheet_name="Escenario Pesimista", index=False)
+        else:
+            proy.to_excel(writer, sheet_name="Proyección", index=False)
+
+        if real is not None:
+            real.to_excel(writer, sheet_name="Datos reales", index=False)
+    return output.getvalue()
+
+
+# Mismo criterio que el Excel; los archivos de una consolidación grande pesan varios MB
+@st.cache_data(max_entries=8, ttl=3600)
+def columnar(escenarios, real=None, hojas=None, entidades=None):
+    """Bytes de cada formato de exportacion.FORMATOS con la tabla larga de los resultados.
+
+    `hojas` y `entidades` son Consolidacion.hojas() y los nombres de las
+    entidades (como arreglo numpy): el caché se indexa por los resultados y
+    no por el objeto, que la app modifica en su lugar, y hashear dos
+    arreglos contiguos toma milisegundos.
+    """
+    from exportacion import FORMATOS, escribir, tabla_lote, tabla_resultados, unir
+
+    tablas = [tabla_resultados(escenarios, real)]
+    if hojas is not None:
+        matrices = {columna: hojas[:, j, :] for j, columna in enumerate(COLUMNAS)}
+        tablas.append(tabla_lote(matrices, ["realista"] * len(entidades), entidades))
+    tabla = unir(tablas)
+    return {formato: escribir(tabla, formato) for formato in FORMATOS}
+
+
+# ==========================
+# Registro de uso
+# ==========================
+def _juego(supuestos, modo_escenarios, variacion_optimista, variacion_pesimista):
+    juego = {"supuestos": validar_supuestos(supuestos), "modo_escenarios": bool(modo_escenarios)}
+    if modo_escenarios:
+        juego["variacion_optimista"] = float(variacion_optimista)
+        juego["variacion_pesimista"] = float(variacion_pesimista)
+    return juego
+
+
+def registrar_uso(supuestos, modo_escenarios, variacion_optimista=None, variacion_pesimista=None):
+    """Anota el juego de supuestos del rerun en el registro de uso (si está activo)"""
+    if not RUTA_REGISTRO_USO:
+        return
+    linea = json.dumps(_juego(supuestos, modo_escenarios, variacion_optimista, variacion_pesimista),
+                       sort_keys=True)
+    with _lock:
+        try:
+            # Al llegar al máximo el registro pasa a ruta.1 (reemplazando al
+            # anterior): en disco quedan a lo sumo dos archivos
+            if os.path.exists(RUTA_REGISTRO_USO) and os.path.getsize(RUTA_REGISTRO_USO) >= MAX_BYTES_REGISTRO_USO:
+                os.replace(RUTA_REGISTRO_USO, RUTA_REGISTRO_USO + ".1")
+            with open(RUTA_REGISTRO_USO, "a", encoding="utf-8") as f:
+                f.write(linea + "\n")
+        except OSError as e:
+            # El registro solo ayuda al precalentamiento: no debe romper el rerun
+            _log.warning("No se pudo escribir el registro de uso %s: %s", RUTA_REGISTRO_USO, e)
+
+
+def _juego_valido(juego, origen):
+    """El juego normalizado, o None (con un aviso en el log) si no es válido"""
+    try:
+        if not isinstance(juego, dict):
+            raise ValueError("se esperaba un objeto")
+        return _juego(juego.get("supuestos"), juego.get("modo_escenarios", False),
+                      juego.get("variacion_optimista", VARIACION_OPTIMISTA_DEFAULT),
+                      juego.get("variacion_pesimista", VARIACION_PESIMISTA_DEFAULT))
+    except (TypeError, ValueError) as e:
+        _log.warning("Juego de supuestos inválido en %s, se omite: %s (%s)", origen, juego, e)
+        return None
+
+
+def juegos_frecuentes(ruta, top=TOP_REGISTRO_USO):
+    """Los `top` juegos de supuestos válidos más frecuentes del registro de uso (y su rotación)"""
+    conteo = Counter()
+    for archivo in (ruta + ".1", ruta):
+        if os.path.exists(archivo):
+            with open(archivo, encoding="utf-8", errors="replace") as f:
+                for linea in f:
+                    if linea.strip():
+                        conteo[linea.strip()] += 1
+
+    juegos = []
+    for linea, _ in conteo.most_common():
+        if len(juegos) == top:
+            break
+        try:
+            juego = json.loads(linea)
+        except ValueError:
+            # Por ejemplo una línea truncada al detenerse el servidor
+            _log.warning("Línea inválida en %s, se omite: %.80s", ruta, linea)
+            continue
+        juego = _juego_valido(juego, ruta)
+        if juego is not None:
+            juegos.append(juego)
+    return juegos
+
+
+def juegos_configurados(ruta):
+    """Los juegos de supuestos válidos de PRONOSTICO_PRECARGA"""
+    try:
+        with open(ruta, encoding="utf-8") as f:
+            juegos = json.load(f)
+    except (OSError, ValueError) as e:
+        _log.warning("No se pudo leer %s: %s", ruta, e)
+        return []
+    if not isinstance(juegos, list):
+        _log.warning("%s debe contener una lista de juegos de supuestos", ruta)
+        return []
+    return [j for j in (_juego_valido(juego, ruta) for juego in juegos) if j is not None]
+
+
+def juegos_a_precalentar():
+    """Supuestos por defecto, los configurados y los más usados, sin repetir"""
+    juegos = [_juego(SUPUESTOS_DEFAULT, modo, VARIACION_OPTIMISTA_DEFAULT, VARIACION_PESIMISTA_DEFAULT)
+              for modo in (False, True)]
+    if RUTA_PRECARGA:
+        juegos.extend(juegos_configurados(RUTA_PRECARGA))
+    if RUTA_REGISTRO_USO:
+        try:
+            juegos.extend(juegos_frecuentes(RUTA_REGISTRO_USO))
+        except OSError as e:
+            _log.warning("No se pudo leer el registro de uso %s: %s", RUTA_REGISTRO_USO, e)
+
+    unicos = {}
+    for juego in juegos:
+        unicos.setdefault(json.dumps(juego, sort_keys=True), juego)
+    return list(unicos.values())
+
+
+# ==========================
+# Precalentamiento
+# ==========================
+def precalentar(juegos=None, exportar=True):
+    """Calcula proyecciones, figuras y Excel de cada juego; devuelve un resumen"""
+    inicio = time.perf_counter()
+    juegos = juegos_a_precalentar() if juegos is None else juegos
+    errores = 0
+    # Los argumentos se pasan igual que en app.py: el caché distingue
+    # f(x) de f(x, None)
+    for juego in juegos:
+        try:
+            if juego["modo_escenarios"]:
+                resultado = escenarios(juego["supuestos"], juego["variacion_optimista"], juego["variacion_pesimista"],
+                                       None)
+                figuras(resultado["realista"], None, resultado)
+                if exportar:
+                    excel(None, None, resultado)
+            else:
+                df_proy = proyeccion(juego["supuestos"], None)
+                figuras(df_proy, None, None)
+                if exportar:
+                    excel(df_proy, None)
+        except Exception:
+            errores += 1
+            _log.exception("No se pudo precalentar %s", juego)
+
+    resumen = {"juegos": len(juegos), "errores": errores, "segundos": time.perf_counter() - inicio,
+               "fecha": time.time()}
+    _ultimo_precalentamiento.update(resumen)
+    return resumen
+
+
+def _sin_avisos_de_contexto(registro):
+    # El hilo no tiene sesión: cada llamada cacheada avisaría "missing ScriptRunContext"
+    return registro.threadName != "precarga"
+
+
+def _ciclo():
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(
+        _sin_avisos_de_contexto)
+    # Con scripts/servidor.py el hilo arranca antes que el runtime de
+    # Streamlit: se espera a que exista para que los cachés usen su almacenamiento.
+    for _ in range(300):
+        if runtime.exists():
+            break
+        time.sleep(0.1)
+    while True:
+        # Un error no debe terminar el hilo: se reintenta en el siguiente ciclo
+        try:
+            precalentar()
+        except Exception:
+            _log.exception("Falló el precalentamiento")
+        time.sleep(INTERVALO_S)
+
+
+def iniciar():
+    """Lanza el precalentamiento periódico en segundo plano (una sola vez por proceso)"""
+    global _hilo
+    with _lock:
+        if _hilo is None:
+            _hilo = threading.Thread(target=_ciclo, name="precarga", daemon=True)
+            _hilo.start()
+    return _hilo
+
+
+def ultimo_precalentamiento():
+    return dict(_ultimo_precalentamiento)
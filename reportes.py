@@ -0,0 +1,215 @@
+"""Pipeline de reportes: renderiza los gráficos de todas las entidades.
+
+Para los paquetes mensuales de directorio genera, por cada entidad, los
+cuatro gráficos de la app (utilidad neta por escenarios, desglose,
+márgenes y rango de escenarios) en PNG y/o SVG. Usa los mismos
+constructores de graficos.py y un pool de pestañas de Chrome persistentes
+de kaleido que renderizan en paralelo.
+
+El archivo de entidades es un CSV con una columna "Entidad" y columnas
+opcionales con los supuestos de modelo.SUPUESTOS_DEFAULT (ventas_base,
+crecimiento, costo_venta_pct, ...) más variacion_optimista y
+variacion_pesimista. Las celdas vacías toman el valor por defecto.
+
+Uso:
+    python reportes.py entidades.csv --salida reportes/ --formatos png svg --workers 4
+    python reportes.py entidades.csv --salida paquete.zip
+"""
+import argparse
+import asyncio
+import os
+import re
+import tempfile
+import time
+import zipfile
+
+import pandas as pd
+
+from graficos import (
+    OPCIONES_IMAGEN,
+    fig_desglose,
+    fig_margenes,
+    fig_rango_escenarios,
+    fig_utilidad_neta_escenarios,
+)
+from modelo import (
+    SUPUESTOS_NUMERICOS,
+    VARIACION_OPTIMISTA_DEFAULT,
+    VARIACION_PESIMISTA_DEFAULT,
+    calcular_escenarios,
+    supuestos_desde_tabla,
+    validar_supuestos,
+)
+
+# Nombre de archivo -> constructor, en el orden de las pestañas de la app
+GRAFICOS_REPORTE = {
+    "utilidad_neta": fig_utilidad_neta_escenarios,
+    "desglose_financiero": lambda escenarios: fig_desglose(escenarios["realista"]),
+    "margenes_rentabilidad": lambda escenarios: fig_margenes(escenarios["realista"]),
+    "rango_escenarios": fig_rango_escenarios,
+}
+
+FORMATOS = ("png", "svg")
+
+COLUMNAS_NUMERICAS = SUPUESTOS_NUMERICOS + ["variacion_optimista", "variacion_pesimista"]
+
+# Las filas del CSV empiezan en 1 y la primera es el encabezado
+_DESFASE_FILA_CSV = 2
+# Errores que se listan en el mensaje de leer_entidades
+MAX_ERRORES_LISTADOS = 10
+
+
+def leer_entidades(ruta):
+    """Lee el CSV de entidades y devuelve una lista de dicts con sus supuestos.
+
+    Lanza ValueError, antes de renderizar nada, si falta la columna Entidad
+    o hay valores no numéricos (con la fila del CSV de cada uno).
+    """
+    df = pd.read_csv(ruta)
+    if "Entidad" not in df.columns:
+        raise ValueError("El archivo de entidades debe tener la columna 'Entidad'")
+
+    # Una celda no numérica deja toda su columna como texto: se convierte
+    # columna por columna y se reportan las celdas que no son números
+    errores = []
+    for columna in [c for c in COLUMNAS_NUMERICAS if c in df.columns]:
+        numerico = pd.to_numeric(df[columna], errors="coerce")
+        for indice in df.index[numerico.isna() & df[columna].notna()]:
+            errores.append(f"fila {indice + _DESFASE_FILA_CSV}, '{columna}': {df.at[indice, columna]!r}")
+        df[columna] = numerico
+    if errores:
+        listados = "; ".join(errores[:MAX_ERRORES_LISTADOS])
+        if len(errores) > MAX_ERRORES_LISTADOS:
+            listados += f" y {len(errores) - MAX_ERRORES_LISTADOS} más"
+        raise ValueError(f"Valores no numéricos en el archivo de entidades: {listados}")
+
+    entidades = []
+    for fila, supuestos in zip(df.to_dict("records"), supuestos_desde_tabla(df)):
+        variacion_optimista = fila.get("variacion_optimista", VARIACION_OPTIMISTA_DEFAULT)
+        variacion_pesimista = fila.get("variacion_pesimista", VARIACION_PESIMISTA_DEFAULT)
+        entidades.append({
+            "entidad": str(fila["Entidad"]),
+            "supuestos": supuestos,
+            "variacion_optimista": variacion_optimista if pd.notna(variacion_optimista) else VARIACION_OPTIMISTA_DEFAULT,
+            "variacion_pesimista": variacion_pesimista if pd.notna(variacion_pesimista) else VARIACION_PESIMISTA_DEFAULT,
+        })
+    return entidades
+
+
+def _nombre_archivo(texto):
+    return re.sub(r"[^\w\-]+", "_", texto).strip("_") or "entidad"
+
+
+def generar_trabajos(entidades, directorio, formatos=("png",)):
+    """Genera los argumentos de kaleido (figura, ruta, opciones) uno a uno.
+
+    Es un generador para que las figuras se construyan mientras el pool
+    de kaleido ya está renderizando las anteriores.
+    """
+    usados = set()
+    for entidad in entidades:
+        escenarios = calcular_escenarios(
+            entidad["supuestos"],
+            entidad["variacion_optimista"],
+            entidad["variacion_pesimista"],
+        )
+        # Entidades distintas pueden quedar con el mismo nombre de carpeta
+        base = nombre_carpeta = _nombre_archivo(entidad["entidad"])
+        sufijo = 2
+        while nombre_carpeta in usados:
+            nombre_carpeta = f"{base}_{sufijo}"
+            sufijo += 1
+        usados.add(nombre_carpeta)
+        carpeta = os.path.join(directorio, nombre_carpeta)
+        os.makedirs(carpeta, exist_ok=True)
+        for nombre, constructor in GRAFICOS_REPORTE.items():
+            fig = constructor(escenarios)
+            for formato in formatos:
+                yield {
+                    "fig": fig,
+                    "path": os.path.join(carpeta, f"{nombre}.{formato}"),
+                    "opts": dict(OPCIONES_IMAGEN, format=formato),
+                }
+
+
+async def _renderizar(trabajos, workers, errores):
+    import kaleido
+
+    async with kaleido.Kaleido(n=workers) as k:
+        await k.write_fig_from_object(trabajos, error_log=errores)
+
+
+def _empaquetar_zip(directorio, ruta_zip):
+    with zipfile.ZipFile(ruta_zip, "w") as zf:
+        for raiz, _, archivos in os.walk(directorio):
+            for archivo in sorted(archivos):
+                ruta = os.path.join(raiz, archivo)
+                # Los PNG ya vienen comprimidos; los SVG son texto y sí ganan
+                compresion = zipfile.ZIP_STORED if archivo.endswith(".png") else zipfile.ZIP_DEFLATED
+                zf.write(ruta, os.path.relpath(ruta, directorio), compress_type=compresion)
+
+
+def renderizar_reportes(entidades, salida, formatos=("png",), workers=4):
+    """Renderiza los gráficos de todas las entidades en un directorio o ZIP.
+
+    Devuelve un dict con el número de figuras, los segundos transcurridos,
+    las figuras por segundo y los errores de renderizado.
+    """
+    formatos = tuple(formatos)
+    invalidos = set(formatos) - set(FORMATOS)
+    if invalidos:
+        raise ValueError(f"Formatos no soportados: {', '.join(sorted(invalidos))}")
+    # Los supuestos se validan antes de arrancar Chrome y escribir archivos
+    for entidad in entidades:
+        try:
+            validar_supuestos(entidad["supuestos"])
+        except ValueError as e:
+            raise ValueError(f"Entidad {entidad['entidad']!r}: {e}") from None
+
+    es_zip = salida.lower().endswith(".zip")
+    temporal = tempfile.TemporaryDirectory() if es_zip else None
+    directorio = temporal.name if es_zip else salida
+    os.makedirs(directorio, exist_ok=True)
+
+    errores = []
+    inicio = time.perf_counter()
+    try:
+        asyncio.run(_renderizar(generar_trabajos(entidades, directorio, formatos), workers, errores))
+        if es_zip:
+            _empaquetar_zip(directorio, salida)
+    finally:
+        if temporal is not None:
+            temporal.cleanup()
+    transcurrido = time.perf_counter() - inicio
+
+    total = len(entidades) * len(GRAFICOS_REPORTE) * len(formatos)
+    generadas = total - len(errores)
+    return {
+        "figuras": generadas,
+        "segundos": transcurrido,
+        "figuras_por_segundo": generadas / transcurrido if transcurrido > 0 else 0.0,
+        "errores": [str(e) for e in errores],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Renderiza los gráficos del pronóstico para muchas entidades")
+    parser.add_argument("entidades", help="CSV con la columna Entidad y los supuestos de cada una")
+    parser.add_argument("--salida", default="reportes", help="Directorio de salida o archivo .zip")
+    parser.add_argument("--formatos", nargs="+", choices=FORMATOS, default=["png"])
+    parser.add_argument("--workers", type=int, default=4, help="Pestañas de Chrome renderizando en paralelo")
+    args = parser.parse_args()
+
+    entidades = leer_entidades(args.entidades)
+    resultado = renderizar_reportes(entidades, args.salida, args.formatos, args.workers)
+
+    print(f"Entidades:        {len(entidades)}")
+    print(f"Figuras:          {resultado['figuras']} en {resultado['segundos']:.1f}s")
+    print(f"Figuras/s:        {resultado['figuras_por_segundo']:.1f}")
+    print(f"Salida:           {args.salida}")
+    for error in resultado["errores"]:
+        print(f"❌ {error}")
+
+
+if __name__ == "__main__":
+    main()
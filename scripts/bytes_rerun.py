@@ -0,0 +1,114 @@
+"""Bytes enviados al navegador por rerun, en total y por gráfico.
+
+Ejecuta app.py con AppTest en cada vista (normal, con datos reales, modo
+escenarios y escenarios con datos reales), intercepta los mensajes que el
+servidor envía al navegador y reporta, del segundo rerun de cada vista
+(el primero incluye la apertura de la sesión):
+
+- los bytes de todos los mensajes y los de los gráficos de Plotly,
+- los mismos bytes comprimidos con deflate, como aproximación a un enlace
+  con compresión,
+- los bytes de cada gráfico por su key.
+
+Uso:
+    python scripts/bytes_rerun.py
+    python scripts/bytes_rerun.py --vistas escenarios
+"""
+import argparse
+import os
+import sys
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from streamlit.runtime.scriptrunner_utils.script_run_context import ScriptRunContext  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from carga_app import app_con_archivo, excel_reales  # noqa: E402
+
+VISTAS = {
+    "normal": {"escenarios": False, "reales": False},
+    "reales": {"escenarios": False, "reales": True},
+    "escenarios": {"escenarios": True, "reales": False},
+    "escenarios_reales": {"escenarios": True, "reales": True},
+}
+
+_ETIQUETA_ESCENARIOS = "Activar análisis de escenarios"
+
+
+def capturar():
+    """Intercepta los mensajes al navegador; devuelve la lista donde se acumulan"""
+    mensajes = []
+    enviar = ScriptRunContext.enqueue
+
+    def enqueue(self, msg):
+        mensajes.append(msg)
+        return enviar(self, msg)
+
+    ScriptRunContext.enqueue = enqueue
+    return mensajes
+
+
+def medir(mensajes):
+    """Bytes totales, de gráficos y por gráfico de una lista de mensajes"""
+    por_grafico = defaultdict(int)
+    serializados = []
+    graficos = []
+    for msg in mensajes:
+        datos = msg.SerializeToString()
+        serializados.append(datos)
+        if msg.WhichOneof("type") == "delta" and msg.delta.new_element.WhichOneof("type") == "plotly_chart":
+            grafico = msg.delta.new_element.plotly_chart
+            # El id del elemento termina en la key del gráfico
+            por_grafico[grafico.id.rsplit("-", 1)[-1]] += len(datos)
+            graficos.append(datos)
+    return {
+        "total": sum(map(len, serializados)),
+        "total_deflate": len(zlib.compress(b"".join(serializados))),
+        "graficos": sum(map(len, graficos)),
+        "graficos_deflate": len(zlib.compress(b"".join(graficos))),
+        "por_grafico": dict(por_grafico),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes enviados al navegador por rerun")
+    parser.add_argument("--vistas", nargs="+", choices=list(VISTAS), default=list(VISTAS))
+    args = parser.parse_args()
+
+    mensajes = capturar()
+    archivo = excel_reales(np.random.default_rng(0))
+    ruta_app = os.path.join(RAIZ, "app.py")
+
+    print(f"{'vista':20}{'total':>10}{'deflate':>10}{'gráficos':>10}{'deflate':>10}")
+    detalle = {}
+    for nombre in args.vistas:
+        vista = VISTAS[nombre]
+        at = AppTest.from_function(app_con_archivo, args=(ruta_app,), default_timeout=120)
+        if vista["reales"]:
+            at.session_state["_archivo_real"] = archivo
+        at.run()
+        if vista["escenarios"]:
+            next(c for c in at.sidebar.checkbox if c.label == _ETIQUETA_ESCENARIOS).set_value(True)
+            at.run()
+
+        del mensajes[:]
+        at.run()
+        if at.exception:
+            raise SystemExit(f"Excepción en la vista {nombre}: {at.exception[0].message}")
+
+        r = medir(mensajes)
+        detalle[nombre] = r["por_grafico"]
+        print(f"{nombre:20}{r['total']:>10,}{r['total_deflate']:>10,}{r['graficos']:>10,}{r['graficos_deflate']:>10,}")
+
+    print("\nBytes por gráfico:")
+    for nombre, por_grafico in detalle.items():
+        print(f"  {nombre}: " + ", ".join(f"{k}={v:,}" for k, v in sorted(por_grafico.items())))
+
+
+if __name__ == "__main__":
+    main()
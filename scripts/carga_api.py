@@ -0,0 +1,136 @@
+"""Generador de carga para la API local (api.py).
+
+Lanza varios clientes concurrentes con conexiones persistentes contra
+localhost y reporta solicitudes/s, juegos de supuestos/s y latencias
+p50/p95/p99. Si no se indica --url, levanta la API en un hilo en un
+puerto libre.
+
+Uso:
+    python scripts/carga_api.py --endpoint lote --tam-lote 500 --clientes 8 --duracion 10
+    python scripts/carga_api.py --url http://127.0.0.1:8502 --endpoint escenarios
+"""
+import argparse
+import http.client
+import os
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+import orjson
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import crear_servidor  # noqa: E402
+from modelo import SUPUESTOS_DEFAULT  # noqa: E402
+
+
+def supuestos_aleatorios(rng):
+    """Un juego de supuestos alrededor de los valores por defecto"""
+    return {
+        "ventas_base": rng.uniform(10000, 200000),
+        "crecimiento": rng.uniform(-0.05, 0.15),
+        "costo_venta_pct": rng.uniform(30, 80),
+        "gastos_operativos": rng.uniform(5000, 50000),
+        "gastos_financieros": SUPUESTOS_DEFAULT["gastos_financieros"],
+        "tasa_impuestos": SUPUESTOS_DEFAULT["tasa_impuestos"],
+    }
+
+
+def armar_cuerpo(endpoint, tam_lote, rng):
+    if endpoint == "lote":
+        return {"supuestos": [supuestos_aleatorios(rng) for _ in range(tam_lote)]}
+    return {"supuestos": supuestos_aleatorios(rng)}
+
+
+def cliente(host, puerto, endpoint, cuerpos, gzip_activo, fin, latencias, errores, bytes_recibidos):
+    conexion = http.client.HTTPConnection(host, puerto, timeout=30)
+    cabeceras = {"Content-Type": "application/json"}
+    if gzip_activo:
+        cabeceras["Accept-Encoding"] = "gzip"
+    i = 0
+    while time.perf_counter() < fin:
+        cuerpo = cuerpos[i % len(cuerpos)]
+        i += 1
+        inicio = time.perf_counter()
+        try:
+            conexion.request("POST", f"/{endpoint}", body=cuerpo, headers=cabeceras)
+            respuesta = conexion.getresponse()
+            datos = respuesta.read()
+        except (OSError, http.client.HTTPException):
+            errores.append(1)
+            conexion.close()
+            conexion = http.client.HTTPConnection(host, puerto, timeout=30)
+            continue
+        # Solo las respuestas correctas cuentan como rendimiento
+        if respuesta.status != 200:
+            errores.append(1)
+            continue
+        latencias.append(time.perf_counter() - inicio)
+        bytes_recibidos.append(len(datos))
+    conexion.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generador de carga para la API de pronóstico")
+    parser.add_argument("--url", help="URL de una API ya levantada (por defecto se levanta una local)")
+    parser.add_argument("--endpoint", choices=["proyeccion", "escenarios", "lote"], default="lote")
+    parser.add_argument("--tam-lote", type=int, default=100, help="Juegos de supuestos por solicitud en /lote")
+    parser.add_argument("--clientes", type=int, default=4)
+    parser.add_argument("--duracion", type=float, default=5.0, help="Segundos de carga")
+    parser.add_argument("--sin-gzip", action="store_true", help="No pedir respuestas comprimidas")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    servidor = None
+    if args.url:
+        url = urlparse(args.url)
+        host, puerto = url.hostname, url.port or 80
+    else:
+        servidor = crear_servidor("127.0.0.1", 0, silencioso=True)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        host, puerto = servidor.server_address
+
+    rng = random.Random(args.semilla)
+    cuerpos = [orjson.dumps(armar_cuerpo(args.endpoint, args.tam_lote, rng)) for _ in range(16)]
+
+    latencias, errores, bytes_recibidos = [], [], []
+    fin = time.perf_counter() + args.duracion
+    hilos = [
+        threading.Thread(
+            target=cliente,
+            args=(host, puerto, args.endpoint, cuerpos, not args.sin_gzip, fin, latencias, errores, bytes_recibidos),
+        )
+        for _ in range(args.clientes)
+    ]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    transcurrido = time.perf_counter() - inicio
+
+    if servidor is not None:
+        servidor.shutdown()
+        servidor.server_close()
+
+    if not latencias:
+        print("No se completó ninguna solicitud correctamente")
+        sys.exit(1)
+
+    lat_ms = np.array(latencias) * 1000
+    por_solicitud = args.tam_lote if args.endpoint == "lote" else 1
+    print(f"Endpoint:            /{args.endpoint} (gzip={'no' if args.sin_gzip else 'sí'})")
+    print(f"Clientes:            {args.clientes}")
+    print(f"Solicitudes:         {len(latencias)} en {transcurrido:.1f}s ({len(errores)} errores)")
+    print(f"Solicitudes/s:       {len(latencias) / transcurrido:,.1f}")
+    print(f"Supuestos/s:         {len(latencias) * por_solicitud / transcurrido:,.0f}")
+    print(f"Bytes por respuesta: {np.mean(bytes_recibidos):,.0f}")
+    print(f"Latencia p50/p95/p99: {np.percentile(lat_ms, 50):.2f} / "
+          f"{np.percentile(lat_ms, 95):.2f} / {np.percentile(lat_ms, 99):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
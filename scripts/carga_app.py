@@ -0,0 +1,201 @@
+"""Prueba de carga de la app con muchas sesiones simultáneas.
+
+Simula --sesiones analistas sobre un mismo proceso con AppTest. Cada
+sesión tiene su propio session_state y repite, con una pausa aleatoria
+entre acciones, interacciones guionadas: activar/desactivar el modo de
+escenarios, mover el slider de crecimiento, subir (o quitar) un archivo
+de datos reales y cambiar el escenario de la tabla.
+
+AppTest no admite reruns en paralelo y, como en el servidor real, los
+reruns compiten por el mismo GIL, así que se ejecutan de a uno sobre un
+reloj simulado: cada acción llega al terminar la pausa de su sesión, espera
+si hay reruns en curso y su latencia es espera + duración real del rerun.
+Se reportan latencias p50/p95/p99 (global y por acción), reruns por segundo
+y el pico de memoria del proceso.
+
+Uso:
+    python scripts/carga_app.py --sesiones 50 --acciones 10
+    python scripts/carga_app.py --sesiones 200 --acciones 5 --pausa 10
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import memoria  # noqa: E402
+from modelo import MESES  # noqa: E402
+
+MB = 2 ** 20
+
+ACCIONES = ["modo_escenarios", "crecimiento", "archivo_real", "escenario_tabla"]
+
+_ETIQUETA_ESCENARIOS = "Activar análisis de escenarios"
+_ETIQUETA_CRECIMIENTO = "Crecimiento mensual de ventas (%)"
+_ETIQUETA_TABLA = "Selecciona el escenario para ver en detalle:"
+
+
+def app_con_archivo(ruta_app):
+    """Ejecuta app.py con el uploader de datos reales alimentado desde la sesión.
+
+    AppTest no puede subir archivos: si st.session_state["_archivo_real"]
+    tiene bytes, el uploader de Excel los devuelve como archivo subido.
+    """
+    import io
+
+    import streamlit as st
+    from streamlit.delta_generator import DeltaGenerator
+
+    @st.cache_resource
+    def compilar(ruta):
+        with open(ruta, encoding="utf-8") as f:
+            return compile(f.read(), ruta, "exec")
+
+    def file_uploader(label, type=None, **kwargs):
+        contenido = st.session_state.get("_archivo_real")
+        if type == ["xlsx"] and contenido is not None:
+            archivo = io.BytesIO(contenido)
+            archivo.name = "reales.xlsx"
+            archivo.file_id = f"reales-{hash(contenido)}"
+            return archivo
+        return DeltaGenerator.file_uploader(st.sidebar, label, type=type, **kwargs)
+
+    st.sidebar.file_uploader = file_uploader
+    exec(compilar(ruta_app), {"__name__": "__main__", "__file__": ruta_app})
+
+
+def excel_reales(rng):
+    """Excel de datos reales de 12 meses alrededor de los supuestos por defecto"""
+    ventas = 50000 * 1.03 ** np.arange(len(MESES)) * rng.uniform(0.85, 1.15, len(MESES))
+    df = pd.DataFrame({
+        "Mes": MESES,
+        "Ventas": ventas.round(),
+        "Costo de ventas": (ventas * rng.uniform(0.55, 0.65, len(MESES))).round(),
+        "Gastos operativos": rng.uniform(18000, 22000, len(MESES)).round(),
+        "Gastos financieros": 1000.0,
+    })
+    salida = BytesIO()
+    df.to_excel(salida, index=False)
+    return salida.getvalue()
+
+
+def _por_etiqueta(elementos, etiqueta):
+    return next((e for e in elementos if e.label == etiqueta), None)
+
+
+def interactuar(at, accion, rng, archivo):
+    """Aplica una acción a la sesión (sin ejecutar el rerun); devuelve la acción aplicada"""
+    if accion == "escenario_tabla":
+        radio = _por_etiqueta(at.radio, _ETIQUETA_TABLA)
+        if radio is None:
+            # La tabla por escenario solo existe en modo escenarios
+            accion = "modo_escenarios"
+        else:
+            radio.set_value(rng.choice([o for o in radio.options if o != radio.value]))
+            return accion
+
+    if accion == "modo_escenarios":
+        casilla = _por_etiqueta(at.sidebar.checkbox, _ETIQUETA_ESCENARIOS)
+        casilla.set_value(not casilla.value)
+    elif accion == "crecimiento":
+        slider = _por_etiqueta(at.sidebar.slider, _ETIQUETA_CRECIMIENTO)
+        slider.set_value(round(rng.uniform(-5.0, 15.0) * 2) / 2)
+    elif accion == "archivo_real":
+        subido = at.session_state["_archivo_real"] if "_archivo_real" in at.session_state else None
+        at.session_state["_archivo_real"] = None if subido is not None else archivo
+    return accion
+
+
+def percentiles(latencias):
+    ms = np.asarray(latencias) * 1000
+    return np.percentile(ms, 50), np.percentile(ms, 95), np.percentile(ms, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de la app con sesiones simultáneas")
+    parser.add_argument("--sesiones", type=int, default=50, help="Sesiones (analistas) simultáneas")
+    parser.add_argument("--acciones", type=int, default=10, help="Interacciones por sesión")
+    parser.add_argument("--pausa", type=float, default=5.0,
+                        help="Pausa media entre acciones de una sesión, en segundos simulados")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.semilla)
+    archivo = excel_reales(np.random.default_rng(args.semilla))
+    ruta_app = os.path.join(RAIZ, "app.py")
+
+    # Apertura de las sesiones: llegan escalonadas durante la primera pausa
+    sesiones = []
+    for _ in range(args.sesiones):
+        sesiones.append({
+            "at": AppTest.from_function(app_con_archivo, args=(ruta_app,), default_timeout=120),
+            "llegada": rng.uniform(0, args.pausa),
+            "restantes": args.acciones,
+            "abierta": False,
+        })
+
+    latencias = defaultdict(list)
+    rss_pico = memoria.rss_bytes()
+    reloj = 0.0
+    reruns = 0
+    inicio_real = time.perf_counter()
+    pendientes = list(sesiones)
+    while pendientes:
+        sesion = min(pendientes, key=lambda s: s["llegada"])
+        at = sesion["at"]
+        if sesion["abierta"]:
+            accion = interactuar(at, rng.choice(ACCIONES), rng, archivo)
+            sesion["restantes"] -= 1
+        else:
+            accion = "apertura"
+            sesion["abierta"] = True
+
+        # El rerun empieza cuando termina el anterior (un solo intérprete)
+        reloj = max(reloj, sesion["llegada"])
+        inicio = time.perf_counter()
+        at.run()
+        duracion = time.perf_counter() - inicio
+        reloj += duracion
+        reruns += 1
+        if at.exception:
+            print(f"❌ Excepción en '{accion}': {at.exception[0].message}")
+            sys.exit(1)
+
+        latencias[accion].append(reloj - sesion["llegada"])
+        latencias["_servicio"].append(duracion)
+        rss_pico = max(rss_pico, memoria.rss_bytes())
+        sesion["llegada"] = reloj + rng.expovariate(1 / args.pausa)
+        if sesion["restantes"] == 0:
+            pendientes.remove(sesion)
+        if reruns % 200 == 0:
+            print(f"{reruns:>6} reruns  reloj={reloj:,.1f}s  rss={memoria.rss_bytes() / MB:,.1f} MB")
+
+    transcurrido = time.perf_counter() - inicio_real
+    interacciones = [x for accion, lista in latencias.items() if accion in ACCIONES for x in lista]
+    servicio = latencias.pop("_servicio")
+
+    print(f"Sesiones:            {args.sesiones} x {args.acciones} acciones (pausa media {args.pausa:g}s)")
+    print(f"Reruns:              {reruns} en {reloj:,.1f}s simulados ({transcurrido:,.1f}s reales)")
+    print(f"Reruns/s:            {reruns / reloj:,.2f} (capacidad: {len(servicio) / sum(servicio):,.2f})")
+    print(f"Ocupación:           {sum(servicio) / reloj:.0%}")
+    print(f"Memoria pico (RSS):  {rss_pico / MB:,.1f} MB")
+    print(f"Duración del rerun p50/p95/p99: {'{:,.0f} / {:,.0f} / {:,.0f} ms'.format(*percentiles(servicio))}")
+    print(f"Latencia p50/p95/p99:           {'{:,.0f} / {:,.0f} / {:,.0f} ms'.format(*percentiles(interacciones))}")
+    for accion in ["apertura"] + ACCIONES:
+        if latencias.get(accion):
+            p50, p95, p99 = percentiles(latencias[accion])
+            print(f"  {accion:<18} n={len(latencias[accion]):<5} {p50:,.0f} / {p95:,.0f} / {p99:,.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""Arranca la app con los cachés precalentados desde el inicio del servidor.
+
+Lanza el precalentamiento de precarga.py en segundo plano y levanta
+Streamlit en el mismo proceso: en cuanto el runtime existe se calculan las
+proyecciones, figuras y Excel de los supuestos por defecto, de los juegos
+de PRONOSTICO_PRECARGA y de los más usados según PRONOSTICO_REGISTRO_USO,
+así la primera sesión ya los encuentra en caché.
+
+Uso:
+    python scripts/servidor.py
+    python scripts/servidor.py --server.port 8502 --server.headless true
+"""
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from streamlit.web import cli as stcli  # noqa: E402
+
+import precarga  # noqa: E402
+
+
+def main():
+    precarga.iniciar()
+    # El resto de la línea de comandos son opciones de `streamlit run`
+    sys.argv = ["streamlit", "run", os.path.join(RAIZ, "app.py"), *sys.argv[1:]]
+    sys.exit(stcli.main())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Prueba de resistencia de memoria de la app.
+
+Ejecuta app.py miles de veces en proceso con AppTest, variando los
+supuestos y el modo de escenarios, y abriendo una sesión nueva (con su
+propio id) cada --reruns-por-sesion reruns. Tras un calentamiento compara
+el RSS del proceso (y con --tracemalloc la memoria de Python) al final
+contra el valor tras el calentamiento, y verifica que los cachés y el
+registro de sesiones (acotado a --max-sesiones) respeten su límite. Sale
+con código 1 si la memoria no queda acotada.
+
+Uso:
+    python scripts/soak_memoria.py --reruns 3000 --max-crecimiento-mb 25
+    python scripts/soak_memoria.py --reruns 500 --tracemalloc
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner  # noqa: E402
+
+import memoria  # noqa: E402
+
+MB = 2 ** 20
+
+
+def interactuar(at, i):
+    """Cambia un supuesto distinto en cada rerun"""
+    sidebar = at.sidebar
+    paso = i % 5
+    if paso == 0:
+        sidebar.checkbox[0].set_value(not sidebar.checkbox[0].value)
+    elif paso == 1:
+        sidebar.number_input[0].set_value(40000.0 + (i % 97) * 500)
+    elif paso == 2:
+        slider = sidebar.slider[2] if sidebar.checkbox[0].value else sidebar.slider[0]
+        slider.set_value(float(i % 20))
+    elif paso == 3 and at.radio:
+        at.radio[0].set_value(["Realista", "Optimista", "Pesimista"][i % 3])
+    return at.run()
+
+
+def ids_de_sesion():
+    """AppTest usa siempre el mismo id de sesión: devuelve un contador que
+    fija el id de las sesiones que se abran desde ahora ("soak-<n>")"""
+    sesion = [0]
+    iniciar = LocalScriptRunner.__init__
+
+    def __init__(self, *args, **kwargs):
+        iniciar(self, *args, **kwargs)
+        self._session_id = f"soak-{sesion[0]}"
+
+    LocalScriptRunner.__init__ = __init__
+    return sesion
+
+
+def memoria_python():
+    return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de resistencia de memoria de la app")
+    parser.add_argument("--reruns", type=int, default=2000)
+    parser.add_argument("--reruns-por-sesion", type=int, default=50)
+    parser.add_argument("--calentamiento", type=int, default=200, help="Reruns antes de tomar la línea base")
+    parser.add_argument("--max-crecimiento-mb", type=float, default=25.0,
+                        help="Crecimiento máximo permitido tras el calentamiento")
+    parser.add_argument("--max-sesiones", type=int, default=10,
+                        help="Límite del registro de sesiones (menor que las sesiones abiertas, para podarlo)")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="Medir también la memoria de Python (muy lento: usar con pocos reruns)")
+    args = parser.parse_args()
+
+    if args.tracemalloc:
+        memoria.iniciar_tracemalloc()
+    memoria.MAX_SESIONES_REGISTRADAS = args.max_sesiones
+    sesion = ids_de_sesion()
+    app = os.path.join(RAIZ, "app.py")
+
+    base_py = base_rss = None
+    at = None
+    inicio = time.perf_counter()
+    for i in range(args.reruns):
+        if i % args.reruns_por_sesion == 0:
+            sesion[0] = i // args.reruns_por_sesion
+            at = AppTest.from_file(app, default_timeout=60).run()
+        else:
+            at = interactuar(at, i)
+        if at.exception:
+            print(f"❌ Excepción en el rerun {i}: {at.exception[0].message}")
+            sys.exit(1)
+
+        if i + 1 == args.calentamiento:
+            base_py = memoria_python()
+            base_rss = memoria.rss_bytes()
+        if (i + 1) % 500 == 0:
+            print(f"{i + 1:>6} reruns  rss={memoria.rss_bytes() / MB:,.1f} MB")
+    transcurrido = time.perf_counter() - inicio
+
+    if base_rss is None:
+        print("❌ --reruns debe ser mayor que --calentamiento")
+        sys.exit(1)
+
+    final_py = memoria_python()
+    final_rss = memoria.rss_bytes()
+    crecimiento_rss = (final_rss - base_rss) / MB
+    caches = memoria.estadisticas_cache()
+    sesiones = memoria.resumen_sesiones()
+
+    print(f"Reruns:               {args.reruns} en {transcurrido:.1f}s ({args.reruns / transcurrido:.1f}/s)")
+    if final_py is not None:
+        crecimiento_py = (final_py - base_py) / MB
+        print(f"Memoria Python:       {base_py / MB:,.1f} -> {final_py / MB:,.1f} MB ({crecimiento_py:+.1f} MB)")
+    print(f"RSS:                  {base_rss / MB:,.1f} -> {final_rss / MB:,.1f} MB ({crecimiento_rss:+.1f} MB)")
+    print(f"Sesiones registradas: {sesiones['sesiones']} de {sesion[0] + 1} abiertas "
+          f"({sesiones['bytes_total'] / 1024:,.1f} KB, máx. {args.max_sesiones})")
+    for cache in caches:
+        print(f"Caché {cache['cache']}: {cache['entradas']} entradas, {cache['bytes'] / 1024:,.1f} KB "
+              f"(máx. {cache['max_entradas']})")
+
+    fallas = []
+    if final_py is not None and crecimiento_py > args.max_crecimiento_mb:
+        fallas.append(f"la memoria de Python creció {crecimiento_py:.1f} MB")
+    if crecimiento_rss > args.max_crecimiento_mb:
+        fallas.append(f"el RSS creció {crecimiento_rss:.1f} MB")
+    if sesiones["sesiones"] > args.max_sesiones:
+        fallas.append(f"el registro de sesiones supera su máximo ({sesiones['sesiones']})")
+    for cache in caches:
+        if cache["max_entradas"] is not None and cache["entradas"] > cache["max_entradas"]:
+            fallas.append(f"el caché {cache['cache']} supera su máximo de entradas")
+
+    if fallas:
+        print(f"❌ Memoria no acotada: {'; '.join(fallas)}")
+        sys.exit(1)
+    print("✅ Memoria acotada")
+
+
+if __name__ == "__main__":
+    main()
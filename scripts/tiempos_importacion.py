@@ -0,0 +1,153 @@
+"""Reporte de tiempos de arranque e importación de la app.
+
+Ejecuta el primer rerun de app.py con AppTest en un proceso nuevo (en frío)
+con `python -X importtime`, una vez por modo de arranque (diferido, el de
+por defecto, e inmediato con PRONOSTICO_CARGA_DIFERIDA=0), y reporta:
+
+- el tiempo del primer rerun y el tiempo hasta el primer contenido y
+  hasta los KPIs (la primera métrica enviada al navegador),
+- el tiempo de importación por paquete, solo de lo que se importa durante
+  el rerun (streamlit y AppTest ya están cargados en el servidor).
+
+Uso:
+    python scripts/tiempos_importacion.py
+    python scripts/tiempos_importacion.py --repeticiones 5 --top 20
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODOS = {"diferido": "1", "inmediato": "0"}
+
+_LINEA_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+_MARCA_INICIO = "__inicio_rerun__"
+
+
+def medir_en_frio():
+    """Primer rerun de la app en este proceso (se ejecuta en el proceso hijo)"""
+    import time
+
+    from streamlit.runtime.scriptrunner_utils.script_run_context import ScriptRunContext
+    from streamlit.testing.v1 import AppTest
+
+    marcas = {}
+    enviar = ScriptRunContext.enqueue
+
+    def enqueue(self, msg):
+        ahora = time.perf_counter()
+        if msg.WhichOneof("type") == "delta":
+            marcas.setdefault("primer_contenido", ahora)
+            if msg.delta.new_element.WhichOneof("type") == "metric":
+                marcas.setdefault("kpis", ahora)
+        return enviar(self, msg)
+
+    ScriptRunContext.enqueue = enqueue
+    at = AppTest.from_file(os.path.join(RAIZ, "app.py"), default_timeout=120)
+
+    # Las importaciones anteriores a esta marca no se cuentan
+    sys.stderr.write(f"import time: 0 | 0 | {_MARCA_INICIO}\n")
+    sys.stderr.flush()
+    inicio = time.perf_counter()
+    at.run()
+    fin = time.perf_counter()
+
+    if at.exception:
+        raise SystemExit(at.exception[0].message)
+    print(json.dumps({
+        "rerun_s": fin - inicio,
+        "primer_contenido_s": marcas.get("primer_contenido", fin) - inicio,
+        "kpis_s": marcas.get("kpis", fin) - inicio,
+    }))
+
+
+def _paquetes(stderr):
+    """Tiempo propio de importación (ms) por paquete raíz, tras la marca de inicio"""
+    tiempos = defaultdict(float)
+    contando = False
+    for linea in stderr.splitlines():
+        m = _LINEA_IMPORTTIME.match(linea)
+        if not m:
+            continue
+        modulo = m.group(4)
+        if modulo == _MARCA_INICIO:
+            contando = True
+        elif contando:
+            tiempos[modulo.split(".")[0]] += int(m.group(1)) / 1000
+    return tiempos
+
+
+def ejecutar(modo):
+    """Corre medir_en_frio en un proceso nuevo y devuelve (métricas, ms por paquete)"""
+    entorno = dict(os.environ, PRONOSTICO_CARGA_DIFERIDA=MODOS[modo])
+    entorno["PYTHONPATH"] = os.pathsep.join(filter(None, [RAIZ, entorno.get("PYTHONPATH")]))
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.abspath(__file__), "--hijo"],
+        capture_output=True, text=True, env=entorno, cwd=RAIZ,
+    )
+    if proceso.returncode != 0:
+        raise SystemExit(f"Falló el modo {modo}:\n{proceso.stderr[-2000:]}")
+    metricas = json.loads(proceso.stdout.strip().splitlines()[-1])
+    return metricas, _paquetes(proceso.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reporte de tiempos de arranque e importación")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Procesos en frío por modo (se usa la mediana)")
+    parser.add_argument("--top", type=int, default=15, help="Paquetes a mostrar en el desglose")
+    parser.add_argument("--hijo", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        medir_en_frio()
+        return
+
+    # Los modos se alternan para que la carga de la máquina afecte a ambos por igual
+    todas = defaultdict(list)
+    for _ in range(args.repeticiones):
+        for modo in MODOS:
+            todas[modo].append(ejecutar(modo))
+
+    resultados = {}
+    for modo, corridas in todas.items():
+        paquetes = defaultdict(list)
+        for _, tiempos in corridas:
+            for paquete, ms in tiempos.items():
+                paquetes[paquete].append(ms)
+        resultados[modo] = {
+            "metricas": {
+                clave: statistics.median(m[clave] for m, _ in corridas) for clave in corridas[0][0]
+            },
+            "paquetes": {
+                p: statistics.median(v + [0.0] * (args.repeticiones - len(v))) for p, v in paquetes.items()
+            },
+        }
+
+    diferido, inmediato = resultados["diferido"], resultados["inmediato"]
+    print(f"Mediana de {args.repeticiones} procesos en frío por modo\n")
+    print(f"{'':28}{'inmediato':>12}{'diferido':>12}{'cambio':>10}")
+    for clave, nombre in [("primer_contenido_s", "Primer contenido"), ("kpis_s", "KPIs en pantalla"),
+                          ("rerun_s", "Primer rerun completo")]:
+        antes, despues = inmediato["metricas"][clave] * 1000, diferido["metricas"][clave] * 1000
+        print(f"{nombre:28}{antes:>10,.0f}ms{despues:>10,.0f}ms{(despues - antes) / antes:>+10.0%}")
+    total_antes = sum(inmediato["paquetes"].values())
+    total_despues = sum(diferido["paquetes"].values())
+    print(f"{'Importaciones en el rerun':28}{total_antes:>10,.0f}ms{total_despues:>10,.0f}ms"
+          f"{(total_despues - total_antes) / total_antes:>+10.0%}")
+
+    print(f"\nImportaciones por paquete (ms, tiempo propio, top {args.top}):")
+    paquetes = sorted(set(inmediato["paquetes"]) | set(diferido["paquetes"]),
+                      key=lambda p: -max(inmediato["paquetes"].get(p, 0), diferido["paquetes"].get(p, 0)))
+    print(f"{'paquete':28}{'inmediato':>12}{'diferido':>12}")
+    for paquete in paquetes[:args.top]:
+        print(f"{paquete:28}{inmediato['paquetes'].get(paquete, 0):>12,.1f}{diferido['paquetes'].get(paquete, 0):>12,.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import http.client
+import threading
+
+import orjson
+import pytest
+
+import api
+
+
+@pytest.fixture(scope="module")
+def servidor():
+    srv = api.crear_servidor("127.0.0.1", 0, silencioso=True)
+    hilo = threading.Thread(target=srv.serve_forever, daemon=True)
+    hilo.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def enviar(servidor, ruta, cuerpo=None, cabeceras=None):
+    conexion = http.client.HTTPConnection("127.0.0.1", servidor.server_address[1], timeout=10)
+    try:
+        if isinstance(cuerpo, (dict, list)):
+            cuerpo = orjson.dumps(cuerpo)
+        if cabeceras is None:
+            conexion.request("POST", ruta, body=cuerpo)
+        else:
+            # Cabeceras a mano, sin el Content-Length que calcula http.client
+            conexion.putrequest("POST", ruta)
+            for clave, valor in cabeceras.items():
+                conexion.putheader(clave, valor)
+            conexion.endheaders()
+        respuesta = conexion.getresponse()
+        return respuesta.status, orjson.loads(respuesta.read())
+    finally:
+        conexion.close()
+
+
+def test_proyeccion(servidor):
+    estado, datos = enviar(servidor, "/proyeccion", {"supuestos": {"ventas_base": 1000}})
+    assert estado == 200
+    assert datos["proyeccion"]["Ventas"][0] == 1000
+
+
+def test_lote(servidor):
+    estado, datos = enviar(servidor, "/lote", {"supuestos": [{}, {}], "multiplicadores": [1, 2.5]})
+    assert estado == 200
+    assert datos["n"] == 2
+
+
+@pytest.mark.parametrize("ruta, cuerpo", [
+    ("/proyeccion", b"{no es json"),
+    ("/proyeccion", [1, 2]),
+    ("/proyeccion", {"supuestos": {"ventas_base": "abc"}}),
+    ("/proyeccion", {"supuestos": {"factores_estacionalidad": {"Ene": None}}}),
+    ("/proyeccion", {"supuestos": {"eventos": {"Ene": [1, 2]}}}),
+    ("/proyeccion", {"multiplicador": "1"}),
+    ("/escenarios", {"variacion_optimista": None}),
+    ("/lote", {"supuestos": []}),
+    ("/lote", {"supuestos": [{}], "multiplicadores": [[1, 2]]}),
+    ("/lote", {"supuestos": [{}], "multiplicadores": [None]}),
+    ("/lote", {"supuestos": [{}], "multiplicadores": [True]}),
+    ("/lote", {"supuestos": [{}, {}], "multiplicadores": [1]}),
+])
+def test_solicitudes_invalidas(servidor, ruta, cuerpo):
+    estado, datos = enviar(servidor, ruta, cuerpo)
+    assert estado == 400
+    assert "error" in datos
+
+
+def test_lote_demasiado_grande(servidor):
+    estado, _ = enviar(servidor, "/lote", {"supuestos": [{}] * (api.MAX_LOTE + 1)})
+    assert estado == 413
+
+
+def test_cuerpo_demasiado_grande(servidor):
+    estado, _ = enviar(servidor, "/lote", cabeceras={"Content-Length": str(api.MAX_CUERPO + 1)})
+    assert estado == 413
+
+
+@pytest.mark.parametrize("largo", ["abc", "-5"])
+def test_content_length_invalido(servidor, largo):
+    estado, _ = enviar(servidor, "/lote", cabeceras={"Content-Length": largo})
+    assert estado == 400
+
+
+def test_ruta_desconocida(servidor):
+    estado, _ = enviar(servidor, "/nada", {})
+    assert estado == 404
+
+
+def test_error_interno_responde_500(servidor, monkeypatch):
+    def falla(datos):
+        raise RuntimeError("falla")
+
+    monkeypatch.setitem(api.RUTAS, "/proyeccion", falla)
+    estado, datos = enviar(servidor, "/proyeccion", {})
+    assert estado == 500
+    assert "error" in datos
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from consolidacion import Consolidacion, validar_jerarquia
+from eventos import calendario_manual
+from modelo import COLUMNAS, calcular_proyeccion
+
+
+def jerarquia(n=40, regiones=6):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "Entidad": [f"E{i}" for i in range(n)],
+        "Region": [f"R{i % regiones}" for i in range(n)],
+        "Empresa": ["Norte" if i % regiones < 3 else "Sur" for i in range(n)],
+        "ventas_base": rng.uniform(1e4, 1e6, n),
+        "crecimiento": rng.uniform(-0.02, 0.08, n),
+    })
+
+
+def comparar(a, b):
+    for nivel in a.niveles:
+        for nombre in a.nodos(nivel):
+            np.testing.assert_allclose(a.valores(nivel, nombre), b.valores(nivel, nombre), rtol=1e-12, atol=1e-6)
+
+
+def test_hojas_iguales_a_la_proyeccion():
+    tabla = jerarquia()
+    c = Consolidacion(tabla)
+    df = calcular_proyeccion({"ventas_base": tabla["ventas_base"][3], "crecimiento": tabla["crecimiento"][3]})
+    np.testing.assert_allclose(c.a_dataframe("Entidad", "E3")[COLUMNAS], df[COLUMNAS])
+
+
+def test_rollups_son_la_suma_de_los_hijos():
+    c = Consolidacion(jerarquia())
+    for nivel in c.niveles[1:]:
+        for nombre in c.nodos(nivel):
+            nivel_hijo, hijos = c.hijos(nivel, nombre)
+            np.testing.assert_allclose(c.valores(nivel, nombre), sum(c.valores(nivel_hijo, h) for h in hijos))
+
+
+def test_actualizacion_incremental_igual_a_recalcular():
+    tabla = jerarquia()
+    c = Consolidacion(tabla)
+    cambios = {"E0": {"ventas_base": 5e5, "crecimiento": 0.1}, "E7": {"costo_venta_pct": 80.0}}
+    for entidad, supuestos in cambios.items():
+        actualizados = c.actualizar_entidad(entidad, supuestos)
+        assert actualizados[0] == ("Entidad", entidad)
+        assert [nivel for nivel, _ in actualizados] == c.niveles
+
+    # Desde cero con los mismos supuestos
+    esperada = tabla.copy()
+    esperada.loc[0, ["ventas_base", "crecimiento"]] = [5e5, 0.1]
+    esperada.loc[7, ["ventas_base", "crecimiento"]] = [50000.0, 0.03]
+    esperada.loc[7, "costo_venta_pct"] = 80.0
+    comparar(c, Consolidacion(esperada))
+
+    incremental = {nivel: [c.valores(nivel, n).copy() for n in c.nodos(nivel)] for nivel in c.niveles}
+    c.recalcular()
+    for nivel in c.niveles:
+        for antes, nombre in zip(incremental[nivel], c.nodos(nivel)):
+            np.testing.assert_allclose(antes, c.valores(nivel, nombre), rtol=1e-12, atol=1e-6)
+
+
+def test_entidad_desconocida():
+    with pytest.raises(KeyError):
+        Consolidacion(jerarquia()).actualizar_entidad("X", {})
+
+
+@pytest.mark.parametrize("cambio, mensaje", [
+    (lambda t: t.drop(columns="Region"), "Faltan columnas"),
+    (lambda t: t.assign(Entidad=["E0"] * len(t)), "Entidades repetidas"),
+    (lambda t: t.assign(Empresa=[f"C{i}" for i in range(len(t))]), "más de un Empresa"),
+    (lambda t: t.assign(Region=[None] + list(t["Region"][1:])), "celdas vacías"),
+])
+def test_jerarquia_invalida(cambio, mensaje):
+    with pytest.raises(ValueError, match=mensaje):
+        validar_jerarquia(cambio(jerarquia()))
+
+
+def test_eventos_dirigidos_a_una_entidad():
+    c = Consolidacion(jerarquia())
+    antes = c.valores("Entidad", "E1").copy()
+    region = c.padre("Entidad", "E1")[1]
+    total_region = c.valores("Region", region).copy()
+
+    calendario = calendario_manual(["Jun"], [50.0])
+    calendario["Entidad"] = "E1"
+    c.aplicar_eventos(calendario)
+
+    ventas = COLUMNAS.index("Ventas")
+    assert c.valores("Entidad", "E1")[ventas, 5] == pytest.approx(antes[ventas, 5] * 1.5)
+    np.testing.assert_allclose(c.valores("Entidad", "E2"), Consolidacion(jerarquia()).valores("Entidad", "E2"))
+    assert c.valores("Region", region)[ventas, 5] == pytest.approx(total_region[ventas, 5] + antes[ventas, 5] * 0.5)
+
+    # La actualización incremental conserva los eventos de la entidad
+    c.actualizar_entidad("E1", {"ventas_base": 1000.0})
+    assert c.valores("Entidad", "E1")[ventas, 5] == pytest.approx(1000 * 1.03 ** 5 * 1.5)
+
+
+def test_drilldown_agrupa_el_resto_en_otros():
+    c = Consolidacion(jerarquia(n=40, regiones=1))
+    hijos = c.dataframes_hijos("Region", "R0", max_hijos=5)
+    assert len(hijos) == 6
+    assert "Otros (35)" in hijos
+    total = sum(df["Utilidad neta"] for df in hijos.values())
+    np.testing.assert_allclose(total, c.a_dataframe("Region", "R0")["Utilidad neta"])
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from eventos import anios, calendario_manual, filtrar_anio, matriz_eventos
+from modelo import ESCENARIOS
+from validacion import normalizar_calendario
+
+ESCENARIOS_FILAS = pd.DataFrame({"Escenario": ESCENARIOS})
+
+
+def calendario(filas):
+    """Calendario a partir de (mes 0..11, impacto en fracción, entidad, escenario)"""
+    return pd.DataFrame(filas, columns=["periodo", "impacto", "Entidad", "Escenario"]).assign(anio=np.nan)
+
+
+def test_sin_eventos():
+    np.testing.assert_array_equal(matriz_eventos(None, ESCENARIOS_FILAS), np.ones((3, 12)))
+
+
+def test_suma_y_compuesto():
+    cal = calendario_manual(["Mar", "Mar", "Jun"], [10.0, 20.0, -50.0])
+    suma = matriz_eventos(cal, ESCENARIOS_FILAS, "suma")
+    compuesto = matriz_eventos(cal, ESCENARIOS_FILAS, "compuesto")
+    assert suma[0, 2] == pytest.approx(1.3)
+    assert compuesto[0, 2] == pytest.approx(1.1 * 1.2)
+    assert suma[0, 5] == compuesto[0, 5] == pytest.approx(0.5)
+    assert suma[0, 0] == compuesto[0, 0] == 1.0
+    # Sin dimensiones, todos los escenarios reciben los mismos factores
+    np.testing.assert_array_equal(suma[0], suma[2])
+
+
+def test_ventas_no_quedan_negativas():
+    cal = calendario_manual(["Ene", "Ene", "Feb"], [-80.0, -50.0, -100.0])
+    suma = matriz_eventos(cal, ESCENARIOS_FILAS, "suma")
+    compuesto = matriz_eventos(cal, ESCENARIOS_FILAS, "compuesto")
+    assert suma[0, 0] == 0
+    assert compuesto[0, 0] == pytest.approx(0.2 * 0.5)
+    assert suma[0, 1] == compuesto[0, 1] == 0
+
+    # Un solo evento de menos de -100% también deja el mes en cero
+    cal = calendario_manual(["Mar"], [-200.0])
+    assert matriz_eventos(cal, ESCENARIOS_FILAS, "suma")[0, 2] == 0
+    assert matriz_eventos(cal, ESCENARIOS_FILAS, "compuesto")[0, 2] == 0
+
+
+def test_eventos_por_escenario():
+    cal = calendario([(0, 0.1, None, "optimista"), (0, 0.2, None, None), (1, -0.3, None, "pesimista")])
+    factores = matriz_eventos(cal, ESCENARIOS_FILAS)
+    assert factores[:, 0].tolist() == pytest.approx([1.3, 1.2, 1.2])
+    assert factores[:, 1].tolist() == pytest.approx([1.0, 1.0, 0.7])
+
+
+def test_eventos_por_entidad_y_escenario():
+    filas = pd.DataFrame({"Entidad": ["A", "A", "B"], "Escenario": ["realista", "optimista", "realista"]})
+    cal = calendario([
+        (4, 0.5, "A", None),
+        (4, 0.1, "A", "optimista"),
+        (4, 0.2, None, "realista"),
+        (4, 9.0, "Z", None),  # entidad que no está en las filas
+    ])
+    factores = matriz_eventos(cal, filas)
+    assert factores[:, 4].tolist() == pytest.approx([1.7, 1.6, 1.2])
+
+
+def test_dimension_ausente_en_las_filas():
+    # Sin columna Entidad en las filas, los eventos dirigidos a una entidad no se aplican
+    cal = calendario([(0, 0.5, "A", None), (0, 0.1, None, None)])
+    assert matriz_eventos(cal, ESCENARIOS_FILAS)[:, 0].tolist() == pytest.approx([1.1] * 3)
+
+
+def test_modo_invalido():
+    with pytest.raises(ValueError):
+        matriz_eventos(None, ESCENARIOS_FILAS, "producto")
+
+
+def test_calendario_desde_archivo():
+    df = pd.DataFrame({
+        "Fecha": ["2024-03-10", "15/12/2025", None, "no es fecha", "2024-07-01", "2024-08-01"],
+        "Impacto": ["10%", -5, 3, 4, "abc", -150],
+        "Entidad": [" Tienda 1 ", None, None, None, None, None],
+        "Escenario": ["Optimista", "", None, None, None, None],
+    })
+    cal, reporte = normalizar_calendario(df)
+    assert cal["periodo"].tolist() == [2, 11]
+    assert cal["anio"].tolist() == [2024, 2025]
+    assert cal["impacto"].tolist() == pytest.approx([0.1, -0.05])
+    assert cal["Entidad"].tolist() == ["Tienda 1", None]
+    assert cal["Escenario"].tolist() == ["optimista", None]
+    assert reporte[["fila", "mensaje"]].values.tolist() == [
+        [4, "Fecha vacía"],
+        [5, "Fecha o mes no reconocido"],
+        [6, "Valor no numérico"],
+        [7, "El impacto no puede ser menor a -100%"],
+    ]
+
+
+def test_calendario_por_mes_y_escenario_desconocido():
+    cal, reporte = normalizar_calendario(pd.DataFrame({
+        "Mes": ["Ene", "diciembre"], "Impacto": [5, 5], "Escenario": ["realista", "otro"],
+    }))
+    assert cal["periodo"].tolist() == [0]
+    assert cal["anio"].isna().all()
+    assert reporte["columna"].tolist() == ["Escenario"]
+
+
+def test_filtro_por_anio():
+    cal = pd.concat([
+        calendario_manual(["Ene"], [10.0]),
+        calendario_manual(["Feb", "Mar"], [10.0, 10.0]).assign(anio=[2024.0, 2025.0]),
+    ], ignore_index=True)
+    assert anios(cal) == [2024, 2025]
+    assert filtrar_anio(cal, 2024)["periodo"].tolist() == [0, 1]
+    assert len(filtrar_anio(cal, None)) == 3
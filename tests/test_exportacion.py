@@ -0,0 +1,70 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from consolidacion import Consolidacion
+from exportacion import ESQUEMA, escribir, tabla_consolidacion, tabla_lote, tabla_resultados, unir
+from modelo import COLUMNAS, MESES, calcular_escenarios, proyectar_lote, validar_supuestos
+
+
+def leer(datos, formato):
+    if formato == "parquet":
+        return pq.read_table(io.BytesIO(datos))
+    return pa.ipc.open_file(pa.BufferReader(datos)).read_all()
+
+
+def test_lote_en_formato_largo():
+    supuestos = [validar_supuestos({"ventas_base": v}) for v in (100.0, 200.0)]
+    matrices = proyectar_lote(supuestos)
+    tabla = tabla_lote(matrices, ["realista", "optimista"], ["A", None])
+
+    assert tabla.schema == ESQUEMA
+    assert tabla.num_rows == len(COLUMNAS) * 2 * len(MESES)
+    df = tabla.to_pandas()
+    ventas = df[(df["linea"] == "Ventas") & (df["escenario"] == "optimista")]
+    np.testing.assert_allclose(ventas["valor"], matrices["Ventas"][1])
+    assert ventas["periodo"].tolist() == list(range(1, 13))
+    assert ventas["entidad"].isna().all()
+    assert set(df.loc[df["escenario"] == "realista", "entidad"]) == {"A"}
+
+
+def test_resultados_con_reales():
+    escenarios = calcular_escenarios({})
+    reales = escenarios["realista"].iloc[[0, 2]]
+    df = tabla_resultados(escenarios, reales, entidad="E1").to_pandas()
+
+    real = df[df["escenario"] == "real"]
+    assert real.groupby("linea", observed=True).size().eq(2).all()
+    assert sorted(real["periodo"].unique()) == [1, 3]
+    assert set(df["escenario"]) == {"optimista", "realista", "pesimista", "real"}
+    pesimista = df[(df["escenario"] == "pesimista") & (df["linea"] == "Utilidad neta")]
+    np.testing.assert_allclose(pesimista["valor"], escenarios["pesimista"]["Utilidad neta"])
+
+
+@pytest.mark.parametrize("formato", ["parquet", "arrow"])
+def test_ida_y_vuelta(formato):
+    escenarios = calcular_escenarios({})
+    tabla = unir([tabla_resultados(escenarios), tabla_resultados({"realista": escenarios["realista"]}, entidad="X")])
+    leida = leer(escribir(tabla, formato), formato)
+
+    assert leida.schema.equals(ESQUEMA)
+    assert leida.equals(tabla)
+
+
+def test_consolidacion():
+    jerarquia = pd.DataFrame({"Entidad": ["A", "B", "C"], "Region": ["R", "R", "S"], "Empresa": "X",
+                              "ventas_base": [10.0, 20.0, 30.0]})
+    c = Consolidacion(jerarquia)
+    df = tabla_consolidacion(c).to_pandas()
+    assert len(df) == 3 * len(COLUMNAS) * len(MESES)
+    ventas_c = df[(df["entidad"] == "C") & (df["linea"] == "Ventas")]["valor"]
+    np.testing.assert_allclose(ventas_c, c.a_dataframe("Entidad", "C")["Ventas"])
+
+
+def test_formato_invalido():
+    with pytest.raises(ValueError):
+        escribir(tabla_resultados(calcular_escenarios({})), "csv")
@@ -0,0 +1,67 @@
+import base64
+import json
+
+import numpy as np
+import plotly.io as pio
+import pytest
+
+from graficos import _montos, _porcentajes, fig_rango_escenarios, fig_utilidad_neta_escenarios
+from modelo import MESES, calcular_escenarios
+
+ENTEROS = {"i1", "i2", "i4"}
+
+
+def serializar(fig):
+    """Trazas como las envía st.plotly_chart al navegador"""
+    return json.loads(pio.to_json(fig, validate=False))["data"]
+
+
+def decodificar(valores):
+    """Arreglo numpy de un valor serializado (binario de Plotly o lista)"""
+    if isinstance(valores, dict):
+        return np.frombuffer(base64.b64decode(valores["bdata"]), dtype=valores["dtype"])
+    return np.asarray(valores)
+
+
+def test_montos_enteros():
+    montos = _montos([1.4, -2.6, 1e6])
+    assert montos.dtype == np.int64
+    assert montos.tolist() == [1, -3, 1000000]
+
+
+@pytest.mark.parametrize("valores", [[1.0, 3e9], [1.0, np.nan], [1.0, np.inf]])
+def test_montos_fuera_de_int32_quedan_en_float(valores):
+    montos = _montos(valores)
+    assert montos.dtype == np.float64
+    assert montos[0] == 1.0
+
+
+def test_porcentajes():
+    porcentajes = _porcentajes([12.345, -0.06])
+    assert porcentajes.dtype == np.float32
+    np.testing.assert_allclose(porcentajes, [12.3, -0.1], rtol=1e-6)
+
+
+def test_escenarios_serializados_como_enteros():
+    escenarios = calcular_escenarios({})
+    banda, optimista, realista, pesimista = serializar(fig_utilidad_neta_escenarios(escenarios))
+
+    assert [t["name"] for t in (optimista, realista, pesimista)] == ["Optimista", "Realista", "Pesimista"]
+    for traza in (banda, optimista, realista, pesimista):
+        assert traza["y"]["dtype"] in ENTEROS
+
+    # La banda es el optimista seguido del pesimista al revés, en su propio grupo de leyenda
+    assert banda["legendgroup"] == "rango"
+    assert banda["x"] == MESES + MESES[::-1]
+    np.testing.assert_array_equal(
+        decodificar(banda["y"]),
+        np.concatenate([decodificar(optimista["y"]), decodificar(pesimista["y"])[::-1]]),
+    )
+    np.testing.assert_allclose(decodificar(realista["y"]), escenarios["realista"]["Utilidad neta"], atol=0.5)
+
+
+def test_rango_en_una_sola_caja():
+    (caja,) = serializar(fig_rango_escenarios(calcular_escenarios({})))
+    assert caja["type"] == "box"
+    assert len(decodificar(caja["y"])) == 36
+    assert caja["y"]["dtype"] in ENTEROS
@@ -0,0 +1,52 @@
+import pytest
+
+import memoria
+
+
+@pytest.fixture(autouse=True)
+def sin_sesiones(monkeypatch):
+    monkeypatch.setattr(memoria, "_sesiones", {})
+
+
+def test_sin_admin_se_mide_cada_intervalo(monkeypatch):
+    estado = {"datos": list(range(1000))}
+    primero = memoria.registrar_sesion("s1", estado, medir=False)
+
+    estado["datos"] = list(range(10))
+    segundo = memoria.registrar_sesion("s1", estado, medir=False)
+    assert segundo["bytes"] == primero["bytes"]
+    assert segundo["reruns"] == 2
+
+    monkeypatch.setattr(memoria, "INTERVALO_MEDICION_S", 0)
+    assert memoria.registrar_sesion("s1", estado, medir=False)["bytes"] < primero["bytes"]
+
+
+def test_con_admin_se_mide_siempre():
+    estado = {"datos": list(range(1000))}
+    primero = memoria.registrar_sesion("s1", estado)
+    estado["datos"] = []
+    assert memoria.registrar_sesion("s1", estado)["bytes"] < primero["bytes"]
+
+
+def test_registro_acotado(monkeypatch):
+    monkeypatch.setattr(memoria, "MAX_SESIONES_REGISTRADAS", 3)
+    for i in range(10):
+        memoria.registrar_sesion(f"s{i}", {"i": i})
+    assert memoria.resumen_sesiones()["sesiones"] == 3
+    assert set(memoria._sesiones) == {"s7", "s8", "s9"}
+
+
+def test_tamano_profundo_sigue_atributos():
+    class ConSlots:
+        __slots__ = ("datos",)
+
+        def __init__(self):
+            self.datos = list(range(1000))
+
+    class ConDict:
+        def __init__(self):
+            self.datos = list(range(1000))
+
+    lista = memoria.tamano_profundo(list(range(1000)))
+    assert memoria.tamano_profundo(ConSlots()) > lista
+    assert memoria.tamano_profundo(ConDict()) > lista
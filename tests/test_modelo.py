@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from eventos import calendario_manual, matriz_eventos
+from modelo import (
+    COLUMNAS,
+    MESES,
+    calcular_escenarios,
+    calcular_proyeccion,
+    proyectar_lote,
+    validar_supuestos,
+)
+
+SUPUESTOS = {
+    "ventas_base": 50000.0,
+    "crecimiento": 0.03,
+    "costo_venta_pct": 60.0,
+    "gastos_operativos": 20000.0,
+    "gastos_financieros": 1000.0,
+    "tasa_impuestos": 25.0,
+    "factores_estacionalidad": {"Nov": 1.2, "Dic": 1.5},
+    "eventos": {"Mar": -0.1, "Dic": 0.2},
+}
+
+
+def proyeccion_por_mes(s, multiplicador=1.0):
+    """El cálculo mes a mes que tenía app.py antes de vectorizar el modelo"""
+    filas = []
+    for t, mes in enumerate(MESES):
+        venta = s["ventas_base"] * (1 + s["crecimiento"] * multiplicador) ** t
+        venta *= (s["factores_estacionalidad"] or {}).get(mes, 1.0)
+        venta *= 1 + (s["eventos"] or {}).get(mes, 0.0)
+        cv = venta * s["costo_venta_pct"] / 100
+        ub = venta - cv
+        ebit = ub - s["gastos_operativos"]
+        uai = ebit - s["gastos_financieros"]
+        imp = max(0, uai) * s["tasa_impuestos"] / 100
+        filas.append([venta, cv, ub, s["gastos_operativos"], ebit, s["gastos_financieros"], uai, imp, uai - imp])
+    return np.array(filas)
+
+
+def test_mes_calculado_a_mano():
+    df = calcular_proyeccion(SUPUESTOS)
+    # Diciembre: 50000 * 1.03^11 * 1.5 * 1.2
+    ventas = 50000 * 1.03 ** 11 * 1.5 * 1.2
+    uai = ventas * 0.4 - 20000 - 1000
+    dic = df.iloc[11]
+    assert dic["Ventas"] == pytest.approx(ventas)
+    assert dic["Utilidad antes de impuestos"] == pytest.approx(uai)
+    assert dic["Utilidad neta"] == pytest.approx(uai * 0.75)
+    # Enero: pérdida, sin impuestos
+    assert df.iloc[0]["Impuestos"] == 0
+    assert df.iloc[0]["Utilidad neta"] == pytest.approx(50000 * 0.4 - 21000)
+
+
+def test_proyeccion_igual_al_calculo_por_mes():
+    df = calcular_proyeccion(SUPUESTOS, multiplicador=1.5)
+    np.testing.assert_allclose(df[COLUMNAS].to_numpy(), proyeccion_por_mes(SUPUESTOS, 1.5))
+
+
+def test_escenarios_igual_al_calculo_por_mes():
+    escenarios = calcular_escenarios(SUPUESTOS, 20, -30)
+    for nombre, multiplicador in [("optimista", 1.2), ("realista", 1.0), ("pesimista", 0.7)]:
+        np.testing.assert_allclose(escenarios[nombre][COLUMNAS].to_numpy(),
+                                   proyeccion_por_mes(SUPUESTOS, multiplicador))
+
+
+def test_lote_igual_a_cada_proyeccion():
+    lote = [validar_supuestos(SUPUESTOS), validar_supuestos({"ventas_base": 1000, "crecimiento": -0.05})]
+    matrices = proyectar_lote(lote, [1.0, 2.0])
+    for i, (s, m) in enumerate(zip(lote, [1.0, 2.0])):
+        esperado = proyeccion_por_mes(s, m)
+        for j, columna in enumerate(COLUMNAS):
+            np.testing.assert_allclose(matrices[columna][i], esperado[:, j])
+
+
+def test_factores_eventos_multiplican_las_ventas():
+    factores = np.ones((1, 12))
+    factores[0, 5] = 0.5
+    base = calcular_proyeccion(SUPUESTOS)
+    con_eventos = calcular_proyeccion(SUPUESTOS, 1.0, factores)
+    assert con_eventos["Ventas"][5] == pytest.approx(base["Ventas"][5] * 0.5)
+    assert con_eventos["Ventas"].drop(5).tolist() == base["Ventas"].drop(5).tolist()
+
+
+def test_eventos_del_dict_siguen_las_reglas_del_calendario():
+    # Un evento de -200% deja las ventas en cero, igual que con eventos.matriz_eventos
+    factores = matriz_eventos(calendario_manual(["Ene", "Feb"], [-200.0, 30.0]), pd.DataFrame(index=[0]))
+    con_dict = calcular_proyeccion({**SUPUESTOS, "eventos": {"Ene": -2.0, "Feb": 0.3}})
+    sin_eventos = {**SUPUESTOS, "eventos": None}
+    con_calendario = calcular_proyeccion(sin_eventos, 1.0, factores)
+    assert con_dict["Ventas"][0] == 0
+    np.testing.assert_allclose(con_dict["Ventas"], con_calendario["Ventas"])
+
+
+@pytest.mark.parametrize("supuestos", [
+    {"ventas_base": "abc"},
+    {"crecimiento": True},
+    {"desconocido": 1},
+    {"factores_estacionalidad": {"Ene": None}},
+    {"eventos": {"Ene": [1, 2]}},
+    {"eventos": {"Enero": 0.1}},
+    {"eventos": [0.1]},
+    [],
+])
+def test_supuestos_invalidos(supuestos):
+    with pytest.raises(ValueError):
+        validar_supuestos(supuestos)
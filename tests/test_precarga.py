@@ -0,0 +1,130 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import graficos
+import precarga
+from consolidacion import Consolidacion
+from exportacion import FORMATOS, escribir, tabla_consolidacion, tabla_resultados, unir
+from modelo import SUPUESTOS_DEFAULT, calcular_escenarios
+
+RUTA_APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+@pytest.fixture
+def registro(tmp_path, monkeypatch):
+    ruta = str(tmp_path / "uso.jsonl")
+    monkeypatch.setattr(precarga, "RUTA_REGISTRO_USO", ruta)
+    return ruta
+
+
+def escribir_lineas(ruta, lineas):
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write("\n".join(lineas) + "\n")
+
+
+def test_registrar_uso_rota_al_llegar_al_maximo(registro, monkeypatch):
+    monkeypatch.setattr(precarga, "MAX_BYTES_REGISTRO_USO", 500)
+    for i in range(20):
+        precarga.registrar_uso({"ventas_base": 1000.0 + i}, False)
+
+    assert os.path.getsize(registro) < 500 + 300
+    assert os.path.exists(registro + ".1")
+    # La rotación reemplaza al archivo anterior: a lo sumo dos en disco
+    assert sorted(os.listdir(os.path.dirname(registro))) == ["uso.jsonl", "uso.jsonl.1"]
+    assert len(precarga.juegos_frecuentes(registro, top=100)) < 20
+
+
+def test_juegos_frecuentes_omite_lineas_invalidas(registro):
+    frecuente = json.dumps(precarga._juego({"ventas_base": 70000}, False, None, None), sort_keys=True)
+    raro = json.dumps(precarga._juego({"ventas_base": 80000}, True, 10, -10), sort_keys=True)
+    escribir_lineas(registro, [
+        frecuente, frecuente, frecuente,
+        '{"modo_escen',  # línea truncada
+        '{"supuestos": {"ventas_base": "abc"}, "modo_escenarios": false}',
+        '{"supuestos": {"ventas_base": "abc"}, "modo_escenarios": false}',
+        raro,
+    ])
+    juegos = precarga.juegos_frecuentes(registro, top=5)
+    assert [j["supuestos"]["ventas_base"] for j in juegos] == [70000.0, 80000.0]
+    assert juegos[1]["variacion_optimista"] == 10.0
+
+    assert len(precarga.juegos_frecuentes(registro, top=1)) == 1
+
+
+def test_juegos_configurados_omite_entradas_invalidas(tmp_path):
+    ruta = tmp_path / "precarga.json"
+    ruta.write_text(json.dumps([
+        {"supuestos": {"ventas_base": "abc"}},
+        5,
+        {"supuestos": {"ventas_base": 60000}, "modo_escenarios": True, "variacion_optimista": 30},
+    ]))
+    (juego,) = precarga.juegos_configurados(str(ruta))
+    assert juego["supuestos"]["ventas_base"] == 60000.0
+    assert juego["variacion_optimista"] == 30.0
+
+    ruta.write_text('{"supuestos": {}}')
+    assert precarga.juegos_configurados(str(ruta)) == []
+    assert precarga.juegos_configurados(str(tmp_path / "no_existe.json")) == []
+
+
+def test_juegos_a_precalentar_sin_repetir(tmp_path, registro, monkeypatch):
+    configuracion = tmp_path / "precarga.json"
+    configuracion.write_text(json.dumps([{"supuestos": {}}, {"supuestos": {"ventas_base": 60000}}]))
+    monkeypatch.setattr(precarga, "RUTA_PRECARGA", str(configuracion))
+    precarga.registrar_uso(SUPUESTOS_DEFAULT, False)
+    precarga.registrar_uso({"ventas_base": 60000}, False)
+
+    juegos = precarga.juegos_a_precalentar()
+    # Los por defecto (con y sin escenarios) y el configurado, una vez cada uno
+    assert [(j["supuestos"]["ventas_base"], j["modo_escenarios"]) for j in juegos] == [
+        (50000.0, False), (50000.0, True), (60000.0, False),
+    ]
+
+
+def test_precalentar_llena_las_entradas_que_usa_la_app(monkeypatch):
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    monkeypatch.setattr(precarga, "RUTA_PRECARGA", None)
+    monkeypatch.setattr(precarga, "RUTA_REGISTRO_USO", None)
+    assert precarga.precalentar()["errores"] == 0
+
+    llamadas = []
+    fig_desglose = graficos.fig_desglose
+
+    def contar(*args, **kwargs):
+        llamadas.append(args)
+        return fig_desglose(*args, **kwargs)
+
+    monkeypatch.setattr(graficos, "fig_desglose", contar)
+
+    # Los argumentos de precalentar() deben coincidir con los de app.py:
+    # el caché distingue f(x) de f(x, None)
+    at = AppTest.from_file(RUTA_APP, default_timeout=60).run()
+    assert not at.exception
+    next(c for c in at.sidebar.checkbox if c.label == "Activar análisis de escenarios").set_value(True)
+    at.run()
+    assert not at.exception
+    assert llamadas == []
+
+    # Control: otros supuestos sí construyen las figuras
+    at.sidebar.number_input[0].set_value(12345.0)
+    at.run()
+    assert len(llamadas) == 1
+
+
+def test_columnar_cacheado_por_los_resultados():
+    c = Consolidacion(pd.DataFrame({"Entidad": ["A", "B"], "Region": "R", "Empresa": "X"}))
+    escenarios = calcular_escenarios({})
+    archivos = precarga.columnar(escenarios, None, c.hojas(), np.asarray(c.nodos("Entidad")))
+    tabla = unir([tabla_resultados(escenarios), tabla_consolidacion(c)])
+    assert archivos == {formato: escribir(tabla, formato) for formato in FORMATOS}
+
+    # La consolidación cambia en su lugar: el caché debe notarlo
+    c.actualizar_entidad("A", {"ventas_base": 1.0})
+    assert precarga.columnar(escenarios, None, c.hojas(), np.asarray(c.nodos("Entidad"))) != archivos
@@ -0,0 +1,80 @@
+import os
+import zipfile
+
+import pytest
+
+from modelo import VARIACION_OPTIMISTA_DEFAULT, VARIACION_PESIMISTA_DEFAULT
+from reportes import GRAFICOS_REPORTE, _empaquetar_zip, generar_trabajos, leer_entidades, renderizar_reportes
+
+
+def escribir_csv(tmp_path, texto):
+    ruta = tmp_path / "entidades.csv"
+    ruta.write_text(texto, encoding="utf-8")
+    return str(ruta)
+
+
+def test_leer_entidades(tmp_path):
+    ruta = escribir_csv(tmp_path, "Entidad,ventas_base,crecimiento,variacion_optimista\n"
+                                  "Norte,1000,0.05,\n"
+                                  "Sur,,,30\n")
+    norte, sur = leer_entidades(ruta)
+    assert norte == {
+        "entidad": "Norte",
+        "supuestos": {"ventas_base": 1000.0, "crecimiento": 0.05},
+        "variacion_optimista": VARIACION_OPTIMISTA_DEFAULT,
+        "variacion_pesimista": VARIACION_PESIMISTA_DEFAULT,
+    }
+    # Las celdas vacías toman el valor por defecto
+    assert sur["supuestos"] == {}
+    assert sur["variacion_optimista"] == 30.0
+
+
+def test_valores_no_numericos_con_fila_del_csv(tmp_path):
+    ruta = escribir_csv(tmp_path, "Entidad,ventas_base,variacion_pesimista\n"
+                                  "A,100,-10\n"
+                                  "B,abc,-10\n"
+                                  "C,300,x\n")
+    with pytest.raises(ValueError, match=r"fila 3, 'ventas_base': 'abc'; fila 4, 'variacion_pesimista': 'x'"):
+        leer_entidades(ruta)
+
+
+def test_sin_columna_entidad(tmp_path):
+    with pytest.raises(ValueError, match="Entidad"):
+        leer_entidades(escribir_csv(tmp_path, "Nombre,ventas_base\nA,1\n"))
+
+
+def test_supuestos_invalidos_fallan_antes_de_renderizar(tmp_path):
+    salida = tmp_path / "salida"
+    entidades = [{"entidad": "A", "supuestos": {"ventas_base": "abc"},
+                  "variacion_optimista": 20.0, "variacion_pesimista": -20.0}]
+    with pytest.raises(ValueError, match="Entidad 'A'"):
+        renderizar_reportes(entidades, str(salida))
+    assert not salida.exists()
+
+
+def test_carpetas_sin_repetir(tmp_path):
+    entidades = [{"entidad": nombre, "supuestos": {}, "variacion_optimista": 20.0, "variacion_pesimista": -20.0}
+                 for nombre in ("Norte/Sur", "Norte Sur", "Norte_Sur", "")]
+    trabajos = list(generar_trabajos(entidades, str(tmp_path), formatos=("png", "svg")))
+
+    assert len(trabajos) == len(entidades) * len(GRAFICOS_REPORTE) * 2
+    carpetas = sorted({os.path.basename(os.path.dirname(t["path"])) for t in trabajos})
+    assert carpetas == ["Norte_Sur", "Norte_Sur_2", "Norte_Sur_3", "entidad"]
+    assert {t["opts"]["format"] for t in trabajos} == {"png", "svg"}
+
+
+def test_empaquetar_zip(tmp_path):
+    directorio = tmp_path / "reportes"
+    (directorio / "A").mkdir(parents=True)
+    (directorio / "A" / "grafico.png").write_bytes(b"png" * 100)
+    (directorio / "A" / "grafico.svg").write_text("<svg/>" * 100)
+    ruta_zip = tmp_path / "paquete.zip"
+
+    _empaquetar_zip(str(directorio), str(ruta_zip))
+    with zipfile.ZipFile(ruta_zip) as zf:
+        info = {i.filename: i for i in zf.infolist()}
+        assert set(info) == {"A/grafico.png", "A/grafico.svg"}
+        # Los PNG ya vienen comprimidos: se guardan tal cual
+        assert info["A/grafico.png"].compress_type == zipfile.ZIP_STORED
+        assert info["A/grafico.svg"].compress_type == zipfile.ZIP_DEFLATED
+        assert zf.read("A/grafico.png") == b"png" * 100
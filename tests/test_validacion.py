@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modelo import MESES
+from validacion import meses_y_anios, normalizar_meses, normalizar_reales, reales_del_anio, resumen_reporte
+
+
+def reales(meses, ventas=None, **columnas):
+    n = len(meses)
+    df = pd.DataFrame({
+        "Mes": meses,
+        "Ventas": ventas if ventas is not None else [1000.0] * n,
+        "Costo de ventas": [600.0] * n,
+        "Gastos operativos": [200.0] * n,
+        "Gastos financieros": [10.0] * n,
+    })
+    for columna, valores in columnas.items():
+        df[columna] = valores
+    return df
+
+
+def test_alias_de_meses():
+    meses = pd.Series(["Ene", "ene.", "Febrero", "SETIEMBRE", "sept", " mar ", "3", 12, 7.0, "Diciembre"])
+    assert normalizar_meses(meses).tolist() == [1, 1, 2, 9, 9, 3, 3, 12, 7, 12]
+
+
+def test_meses_con_tilde_y_no_reconocidos():
+    meses = pd.Series(["Ágosto", "13", "0", "Mes", None])
+    numero = normalizar_meses(meses)
+    assert numero[0] == 8
+    assert numero[1:].isna().all()
+
+
+def test_fechas():
+    meses = pd.Series(["2024-03-15", "15/04/2024", pd.Timestamp("2024-11-01")], dtype=object)
+    assert normalizar_meses(meses).tolist() == [3, 4, 11]
+    assert normalizar_meses(pd.Series(pd.to_datetime(["2024-06-01"]))).tolist() == [6]
+
+
+def test_orden_y_mes_categorico():
+    df_real, reporte = normalizar_reales(reales(["Mar", "Ene", "Feb"], ventas=[3.0, 1.0, 2.0]))
+    assert df_real["Mes"].astype(str).tolist() == ["Ene", "Feb", "Mar"]
+    assert df_real["Ventas"].tolist() == [1.0, 2.0, 3.0]
+    assert isinstance(df_real["Mes"].dtype, pd.CategoricalDtype)
+    assert reporte.empty
+
+
+def test_duplicados_se_suman():
+    df_real, reporte = normalizar_reales(reales(["Ene", "Feb", "Ene", "Ene"], ventas=[1.0, 2.0, 4.0, 8.0]))
+    assert df_real["Ventas"].tolist() == [13.0, 2.0]
+    # Un aviso por mes repetido, en su primera fila
+    assert reporte[["fila", "nivel", "mensaje"]].values.tolist() == [
+        [2, "aviso", "Mes repetido en 3 filas: se sumaron"],
+    ]
+
+
+def test_anios_en_fechas():
+    numero, anio = meses_y_anios(pd.Series(["2024-03-15", "Abr", pd.Timestamp("2025-11-01")], dtype=object))
+    assert numero.tolist() == [3, 4, 11]
+    assert anio[[0, 2]].tolist() == [2024, 2025]
+    assert np.isnan(anio[1])
+
+
+def test_mismo_mes_de_anios_distintos_no_se_suma():
+    fechas = pd.date_range("2024-01-01", periods=24, freq="MS").strftime("%Y-%m-%d")
+    df_real, reporte = normalizar_reales(reales(list(fechas), ventas=[100.0] * 12 + [200.0] * 12))
+    assert reporte.empty
+    assert len(df_real) == 24
+    assert sorted(df_real["anio"].unique()) == [2024, 2025]
+
+    del_anio = reales_del_anio(df_real, 2025)
+    assert del_anio["Mes"].astype(str).tolist() == MESES
+    assert del_anio["Ventas"].tolist() == [200.0] * 12
+    assert "anio" not in del_anio.columns
+
+
+def test_reales_del_anio_con_meses_sin_anio():
+    df_real, _ = normalizar_reales(reales(["Ene", "2024-01-10", "Feb", "2023-03-01"], ventas=[1.0, 2.0, 3.0, 4.0]))
+    del_anio = reales_del_anio(df_real, 2024)
+    # La fila con año manda sobre la del mismo mes sin año
+    assert del_anio["Mes"].astype(str).tolist() == ["Ene", "Feb"]
+    assert del_anio["Ventas"].tolist() == [2.0, 3.0]
+
+
+def test_duplicados_ultimo():
+    df_real, _ = normalizar_reales(reales(["Ene", "Feb", "Ene"], ventas=[1.0, 2.0, 4.0]), duplicados="ultimo")
+    assert df_real["Ventas"].tolist() == [4.0, 2.0]
+
+
+def test_reporte_con_filas_del_excel():
+    df = reales(["Ene", "Xyz", None, "Abr", "May"], ventas=["$ 1000", "10", "10", "", "abc"])
+    df_real, reporte = normalizar_reales(df)
+
+    # La fila 1 del Excel es el encabezado: la primera fila de datos es la 2
+    errores = reporte[reporte["nivel"] == "error"]
+    assert errores[["fila", "columna", "mensaje"]].values.tolist() == [
+        [3, "Mes", "Mes no reconocido"],
+        [4, "Mes", "Mes vacío"],
+        [5, "Ventas", "Valor vacío"],
+        [6, "Ventas", "Valor no numérico"],
+    ]
+    assert df_real["Mes"].astype(str).tolist() == ["Ene"]
+    assert df_real["Ventas"].tolist() == [1000.0]
+    assert resumen_reporte(reporte) == {"errores": 4, "avisos": 0, "filas_descartadas": 4}
+
+
+def test_sin_filas_validas():
+    df_real, reporte = normalizar_reales(reales(["Xyz"]))
+    assert df_real is None
+    assert len(reporte) == 1
+
+
+def test_columnas_faltantes():
+    with pytest.raises(ValueError, match="Gastos financieros"):
+        normalizar_reales(reales(["Ene"]).drop(columns="Gastos financieros"))
+
+
+def test_valores_numericos_con_nan():
+    df_real, reporte = normalizar_reales(reales(["Ene", "Feb"], ventas=[1.0, np.nan]))
+    assert df_real["Mes"].astype(str).tolist() == ["Ene"]
+    assert reporte["mensaje"].tolist() == ["Valor vacío"]
@@ -0,0 +1,293 @@
+"""Validación y normalización del archivo de datos reales.
+
+Todo el trabajo es vectorizado con pandas para que archivos de cientos de
+miles de filas se validen en segundos:
+
+- La columna Mes acepta abreviaturas ("Ene", "ene."), nombres completos
+  ("Enero", "setiembre"), números (1..12) y fechas reales; se convierte en
+  un categórico ordenado con las categorías de modelo.MESES.
+- Los valores se convierten a número (se aceptan "$" y espacios); los
+  vacíos o no numéricos se reportan y la fila se descarta.
+- Las fechas conservan su año (columna anio, como en los calendarios):
+  un mismo mes de años distintos no se mezcla.
+- Las filas fuera de orden se ordenan y las de un mismo mes y año se
+  suman (o se conserva la última, según `duplicados`).
+
+normalizar_reales devuelve el DataFrame limpio y un reporte con una fila
+por problema encontrado (fila del Excel, columna, valor, nivel, mensaje);
+reales_del_anio deja una fila por mes del año elegido.
+normalizar_calendario hace lo mismo con los calendarios de eventos.
+"""
+import numpy as np
+import pandas as pd
+
+from modelo import ESCENARIOS, MESES
+
+COLUMNAS_VALORES = ["Ventas", "Costo de ventas", "Gastos operativos", "Gastos financieros"]
+COLUMNAS_REQUERIDAS = ["Mes"] + COLUMNAS_VALORES
+
+COLUMNAS_REPORTE = ["fila", "columna", "valor", "nivel", "mensaje"]
+
+_NOMBRES_MESES = [
+    "enero", "febrero", "marzo", "abril", "mayo", "junio",
+    "julio", "agosto", "septiembre", "octubre", "noviembre", "diciembre",
+]
+
+# Alias (en minúsculas y sin tildes) -> número de mes
+ALIAS_MESES = {}
+for _numero, (_abreviatura, _nombre) in enumerate(zip(MESES, _NOMBRES_MESES), start=1):
+    ALIAS_MESES[_abreviatura.lower()] = _numero
+    ALIAS_MESES[_nombre] = _numero
+ALIAS_MESES["set"] = ALIAS_MESES["setiembre"] = ALIAS_MESES["sept"] = 9
+
+TIPO_MES = pd.CategoricalDtype(MESES, ordered=True)
+
+COLUMNAS_CALENDARIO = ["periodo", "anio", "impacto", "Entidad", "Escenario"]
+
+# Las filas del Excel empiezan en 1 y la primera es el encabezado
+_DESFASE_FILA_EXCEL = 2
+
+
+def _reporte(df, mascara, columna, nivel, mensaje):
+    """Filas del reporte para las filas marcadas en `mascara`"""
+    valores = df.loc[mascara, columna] if columna in df.columns else pd.Series("", index=df.index[mascara])
+    return pd.DataFrame({
+        "fila": df.index[mascara] + _DESFASE_FILA_EXCEL,
+        "columna": columna,
+        "valor": valores.astype("string").fillna("").to_numpy(),
+        "nivel": nivel,
+        "mensaje": mensaje,
+    })
+
+
+def _a_fechas(valores):
+    """Convierte a fechas: primero ISO (rápido), luego formatos libres con el día primero"""
+    fechas = pd.to_datetime(valores, errors="coerce", format="ISO8601")
+    sin_fecha = fechas.isna() & valores.notna()
+    if sin_fecha.any():
+        fechas[sin_fecha] = pd.to_datetime(
+            valores[sin_fecha].astype("string"), errors="coerce", format="mixed", dayfirst=True
+        )
+    return fechas
+
+
+def _a_numero(valores, ignorar=r"[\s$]"):
+    """Convierte a número quitando los caracteres de `ignorar`; devuelve (números, vacíos)"""
+    if pd.api.types.is_numeric_dtype(valores):
+        return valores.astype(float), valores.isna()
+    texto = valores.astype("string").str.replace(ignorar, "", regex=True)
+    return pd.to_numeric(texto, errors="coerce").astype(float), texto.isna() | (texto == "")
+
+
+def _etiquetas(valores):
+    """Texto sin espacios sobrantes; las celdas vacías quedan como None"""
+    texto = valores.astype("string").str.strip()
+    return texto.astype(object).where(texto.notna() & (texto != ""), None)
+
+
+def normalizar_meses(mes):
+    """Convierte una columna de meses a número de mes (1..12, NaN si no se reconoce)"""
+    return meses_y_anios(mes)[0]
+
+
+def meses_y_anios(mes):
+    """Número de mes (1..12) y año de una columna de meses; el año es NaN si no hay fecha"""
+    if pd.api.types.is_datetime64_any_dtype(mes):
+        return mes.dt.month.astype(float), mes.dt.year.astype(float)
+
+    texto = (
+        mes.astype("string")
+        .str.strip()
+        .str.lower()
+        .str.normalize("NFKD")
+        .str.replace(r"[\u0300-\u036f]", "", regex=True)
+        .str.rstrip(".")
+    )
+
+    # 1) Nombres y abreviaturas
+    numero = texto.map(ALIAS_MESES).astype(float)
+
+    # 2) Números de mes (1, "01", 3.0)
+    como_numero = pd.to_numeric(texto.where(numero.isna()), errors="coerce")
+    validos = como_numero.between(1, 12) & (como_numero % 1 == 0)
+    numero[validos] = como_numero[validos]
+
+    # 3) Fechas. Los números fuera de rango no se interpretan como fechas.
+    anio = pd.Series(np.nan, index=mes.index)
+    pendientes = numero.isna() & como_numero.isna() & mes.notna()
+    if pendientes.any():
+        fechas = _a_fechas(mes[pendientes]).dropna()
+        numero[fechas.index] = fechas.dt.month
+        anio[fechas.index] = fechas.dt.year
+    return numero, anio
+
+
+def normalizar_reales(df, duplicados="sumar"):
+    """Valida y normaliza los datos reales subidos.
+
+    Devuelve (df_real, reporte). df_real tiene una fila por mes y año,
+    ordenada, con Mes categórico y el año de la fecha en anio (NaN si solo
+    se dio el mes); es None si no quedó ninguna fila válida. Lanza
+    ValueError si faltan columnas requeridas.
+    """
+    if duplicados not in ("sumar", "ultimo"):
+        raise ValueError("duplicados debe ser 'sumar' o 'ultimo'")
+
+    faltantes = [col for col in COLUMNAS_REQUERIDAS if col not in df.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas requeridas: {', '.join(faltantes)}")
+
+    df = df.reset_index(drop=True)
+    reportes = []
+    fila_valida = pd.Series(True, index=df.index)
+
+    # Mes
+    numero_mes, anio = meses_y_anios(df["Mes"])
+    sin_mes = df["Mes"].isna()
+    mes_invalido = numero_mes.isna() & ~sin_mes
+    reportes.append(_reporte(df, sin_mes, "Mes", "error", "Mes vacío"))
+    reportes.append(_reporte(df, mes_invalido, "Mes", "error", "Mes no reconocido"))
+    fila_valida &= numero_mes.notna()
+
+    # Valores
+    valores = {}
+    for col in COLUMNAS_VALORES:
+        numerico, vacio = _a_numero(df[col])
+        no_numerico = numerico.isna() & ~vacio
+        reportes.append(_reporte(df, vacio, col, "error", "Valor vacío"))
+        reportes.append(_reporte(df, no_numerico, col, "error", "Valor no numérico"))
+        fila_valida &= numerico.notna()
+        valores[col] = numerico
+
+    limpio = pd.DataFrame(valores)
+    limpio.insert(0, "Mes", pd.Categorical.from_codes(
+        numero_mes.fillna(0).astype(int).to_numpy() - 1, dtype=TIPO_MES
+    ))
+    limpio.insert(1, "anio", anio)
+    limpio = limpio[fila_valida]
+
+    # Meses repetidos (del mismo año): un aviso por mes, en su primera fila
+    clave = limpio["anio"].fillna(0) * 100 + numero_mes[fila_valida]
+    repeticiones = clave.map(clave.value_counts())
+    primeras = ~clave.duplicated() & (repeticiones > 1)
+    if primeras.any():
+        accion = "se sumaron" if duplicados == "sumar" else "se conservó la última"
+        mascara = primeras.reindex(df.index, fill_value=False)
+        mensajes = "Mes repetido en " + repeticiones[primeras].astype(int).astype(str) + f" filas: {accion}"
+        reportes.append(_reporte(df, mascara, "Mes", "aviso", mensajes.to_numpy()))
+
+    if duplicados == "sumar":
+        agregados = {"Mes": "first", "anio": "first", **{col: "sum" for col in COLUMNAS_VALORES}}
+        limpio = limpio.groupby(clave, sort=True).agg(agregados).reset_index(drop=True)
+    else:
+        limpio = (limpio[~clave.duplicated(keep="last")]
+                  .assign(_clave=clave).sort_values("_clave", kind="stable")
+                  .drop(columns="_clave").reset_index(drop=True))
+
+    reportes = [r for r in reportes if not r.empty]
+    if reportes:
+        reporte = pd.concat(reportes, ignore_index=True)
+    else:
+        reporte = pd.DataFrame(columns=COLUMNAS_REPORTE)
+    reporte = reporte.sort_values(["fila", "columna"], kind="stable").reset_index(drop=True)
+
+    return (limpio if not limpio.empty else None), reporte
+
+
+def reales_del_anio(df_real, anio=None):
+    """Datos reales de `anio` (y los sin año): una fila por mes, sin la columna anio.
+
+    Con anio None se toman todas las filas; si un mes aparece con y sin
+    año se conserva la fila con año. Devuelve None si no queda ninguna.
+    """
+    if anio is not None:
+        df_real = df_real[df_real["anio"].isna() | (df_real["anio"] == anio)]
+    df_real = (df_real.sort_values(["Mes", "anio"], na_position="first", kind="stable")
+               .drop_duplicates("Mes", keep="last")
+               .drop(columns="anio")
+               .reset_index(drop=True))
+    return df_real if not df_real.empty else None
+
+
+def normalizar_calendario(df):
+    """Valida y normaliza un calendario de eventos especiales.
+
+    Columnas: Fecha o Mes, Impacto (% sobre las ventas del mes) y,
+    opcionalmente, Entidad y Escenario (vacío = aplica a todos). Devuelve
+    (calendario, reporte); el calendario tiene las columnas
+    COLUMNAS_CALENDARIO, con periodo 0..11, el año de la fecha (NaN si solo
+    se dio el mes) e impacto como fracción. Lanza ValueError si faltan
+    columnas requeridas.
+    """
+    faltantes = [col for col in ("Impacto",) if col not in df.columns]
+    if "Fecha" not in df.columns and "Mes" not in df.columns:
+        faltantes.insert(0, "Fecha o Mes")
+    if faltantes:
+        raise ValueError(f"Faltan columnas requeridas: {', '.join(faltantes)}")
+
+    df = df.reset_index(drop=True)
+    reportes = []
+    fila_valida = pd.Series(True, index=df.index)
+
+    # Periodo y año: la fecha manda; si no hay, se usa el mes
+    numero_mes = pd.Series(np.nan, index=df.index)
+    anio = pd.Series(np.nan, index=df.index)
+    if "Fecha" in df.columns:
+        fechas = _a_fechas(df["Fecha"])
+        numero_mes = fechas.dt.month.astype(float)
+        anio = fechas.dt.year.astype(float)
+    if "Mes" in df.columns:
+        numero_mes = numero_mes.fillna(normalizar_meses(df["Mes"]))
+    columna_periodo = "Fecha" if "Fecha" in df.columns else "Mes"
+    sin_periodo = df[[c for c in ("Fecha", "Mes") if c in df.columns]].isna().all(axis=1)
+    periodo_invalido = numero_mes.isna() & ~sin_periodo
+    reportes.append(_reporte(df, sin_periodo, columna_periodo, "error", "Fecha vacía"))
+    reportes.append(_reporte(df, periodo_invalido, columna_periodo, "error", "Fecha o mes no reconocido"))
+    fila_valida &= numero_mes.notna()
+
+    # Impacto
+    impacto, vacio = _a_numero(df["Impacto"], ignorar=r"[\s%]")
+    no_numerico = impacto.isna() & ~vacio
+    fuera_de_rango = impacto < -100
+    reportes.append(_reporte(df, vacio, "Impacto", "error", "Valor vacío"))
+    reportes.append(_reporte(df, no_numerico, "Impacto", "error", "Valor no numérico"))
+    reportes.append(_reporte(df, fuera_de_rango, "Impacto", "error", "El impacto no puede ser menor a -100%"))
+    fila_valida &= impacto.notna() & ~fuera_de_rango
+
+    calendario = pd.DataFrame({
+        "periodo": numero_mes.fillna(1).astype(np.int64) - 1,
+        "anio": anio,
+        "impacto": impacto / 100,
+        "Entidad": _etiquetas(df["Entidad"]) if "Entidad" in df.columns else None,
+        "Escenario": None,
+    })
+
+    # Escenario
+    if "Escenario" in df.columns:
+        escenario = _etiquetas(df["Escenario"])
+        escenario = escenario.str.lower().where(escenario.notna(), None)
+        desconocido = escenario.notna() & ~escenario.isin(ESCENARIOS)
+        reportes.append(_reporte(df, desconocido, "Escenario", "error",
+                                 f"Escenario desconocido (use {', '.join(ESCENARIOS)})"))
+        fila_valida &= ~desconocido
+        calendario["Escenario"] = escenario
+
+    calendario = calendario[fila_valida].reset_index(drop=True)
+
+    reportes = [r for r in reportes if not r.empty]
+    if reportes:
+        reporte = pd.concat(reportes, ignore_index=True)
+    else:
+        reporte = pd.DataFrame(columns=COLUMNAS_REPORTE)
+    reporte = reporte.sort_values(["fila", "columna"], kind="stable").reset_index(drop=True)
+    return calendario, reporte
+
+
+def resumen_reporte(reporte):
+    """Conteo de errores y avisos del reporte"""
+    niveles = reporte["nivel"].value_counts()
+    return {
+        "errores": int(niveles.get("error", 0)),
+        "avisos": int(niveles.get("aviso", 0)),
+        "filas_descartadas": int(reporte.loc[reporte["nivel"] == "error", "fila"].nunique()),
+    }